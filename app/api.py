@@ -1,11 +1,14 @@
+import json
 import os
+import queue
 import sys
 import time
 from copy import deepcopy
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from threading import Lock
+from threading import Event, Lock, Thread
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
 
 
@@ -15,6 +18,8 @@ if str(ROOT_DIR) not in sys.path:
 
 from src.main import run
 from src.config import DEFAULT_PREDICT_PERIOD, DEFAULT_TRAIN_PERIOD, model_path_for_ticker
+from src import registry
+from src.artifacts import start_background_maintenance
 
 
 app = Flask(__name__)
@@ -26,6 +31,26 @@ PREDICT_AUTO_TRAIN_ON_MISS = os.getenv("PREDICT_AUTO_TRAIN_ON_MISS", "true").low
 PREDICT_CACHE = {}
 PREDICT_CACHE_LOCK = Lock()
 
+STREAM_REFRESH_SECONDS = float(os.getenv("STREAM_REFRESH_SECONDS", "30"))
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+STREAM_MAX_TICKERS = int(os.getenv("STREAM_MAX_TICKERS", "20"))
+STREAM_QUEUE_SIZE = 100
+# Every open /stream connection pins one gthread thread for its whole lifetime, so each worker only
+# accepts this many at once (keep it well below gunicorn --threads); above it /stream answers 503.
+# app.asgi serves streams on the event loop and is not limited by this.
+STREAM_MAX_CONNECTIONS = int(os.getenv("STREAM_MAX_CONNECTIONS", "4"))
+STREAM_CONNECTIONS = 0
+# key -> set of subscriber queues; every open /stream connection owns one queue.
+STREAM_SUBSCRIBERS = {}
+# key -> (signature, event) of the last pushed event so new subscribers start with current state.
+STREAM_LAST_EVENTS = {}
+STREAM_LOCK = Lock()
+STREAM_WAKEUP = Event()
+STREAM_REFRESHER = None
+
+# Optional periodic artifact garbage collection + disk-budget eviction (ARTIFACT_GC_INTERVAL_SECONDS > 0).
+ARTIFACT_MAINTENANCE = start_background_maintenance()
+
 
 def _cache_key(ticker: str, period: str):
     return f"{(ticker or 'AAPL').upper().strip()}|{(period or DEFAULT_PREDICT_PERIOD).strip()}"
@@ -74,13 +99,125 @@ def _invalidate_cache_for_ticker(ticker: str):
             PREDICT_CACHE.pop(cache_key, None)
 
 
+def _stream_signature(result: dict):
+    # Inputs change when a new bar arrives (or the live bar moves) or a new artifact is trained.
+    return (result.get("data_end"), result.get("current_price"), result.get("trained_at"))
+
+
+def _publish_stream_event(key: str, signature, event: dict):
+    with STREAM_LOCK:
+        last = STREAM_LAST_EVENTS.get(key)
+        if last is not None and last[0] == signature:
+            return
+        STREAM_LAST_EVENTS[key] = (signature, event)
+        subscribers = list(STREAM_SUBSCRIBERS.get(key, ()))
+
+    for subscriber in subscribers:
+        try:
+            subscriber.put_nowait(event)
+        except queue.Full:
+            # Slow consumer: drop the event rather than block the shared refresh loop.
+            pass
+
+
+def _refresh_stream_key(key: str):
+    ticker, period = key.split("|", 1)
+    try:
+        result = run(ticker=ticker, period=period, force_retrain=False, verbose=False)
+    except Exception as error:
+        _publish_stream_event(key, ("error", str(error)), {"event": "error", "ticker": ticker, "period": period, "error": str(error)})
+        return
+
+    result["cached"] = False
+    result["cache_ttl_seconds"] = PREDICT_CACHE_TTL_SECONDS
+    result["auto_trained"] = False
+    # Share the fresh result with /predict so polling clients also benefit from the stream loop.
+    if PREDICT_CACHE_TTL_SECONDS > 0:
+        _set_cached_prediction(ticker=ticker, period=period, result=result)
+    _publish_stream_event(key, _stream_signature(result), {"event": "prediction", "ticker": ticker, "period": period, "data": result})
+
+
+def _stream_refresh_loop():
+    while True:
+        with STREAM_LOCK:
+            keys = [key for key, subscribers in STREAM_SUBSCRIBERS.items() if subscribers]
+            # Forget state for keys nobody listens to anymore.
+            for key in list(STREAM_LAST_EVENTS.keys()):
+                if key not in STREAM_SUBSCRIBERS:
+                    STREAM_LAST_EVENTS.pop(key, None)
+
+        for key in keys:
+            _refresh_stream_key(key)
+
+        STREAM_WAKEUP.wait(timeout=STREAM_REFRESH_SECONDS)
+        STREAM_WAKEUP.clear()
+
+
+def _ensure_stream_refresher():
+    global STREAM_REFRESHER
+    with STREAM_LOCK:
+        if STREAM_REFRESHER is not None and STREAM_REFRESHER.is_alive():
+            return
+        STREAM_REFRESHER = Thread(target=_stream_refresh_loop, name="stream-refresher", daemon=True)
+        STREAM_REFRESHER.start()
+
+
+def _subscribe(keys: list[str]):
+    subscriber = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+    needs_refresh = False
+    with STREAM_LOCK:
+        for key in keys:
+            STREAM_SUBSCRIBERS.setdefault(key, set()).add(subscriber)
+            last = STREAM_LAST_EVENTS.get(key)
+            if last is not None:
+                subscriber.put_nowait(last[1])
+            else:
+                needs_refresh = True
+
+    _ensure_stream_refresher()
+    if needs_refresh:
+        # First subscriber for a key should not wait a full refresh interval for its first event.
+        STREAM_WAKEUP.set()
+    return subscriber
+
+
+def _acquire_stream_slot():
+    global STREAM_CONNECTIONS
+    with STREAM_LOCK:
+        if STREAM_CONNECTIONS >= STREAM_MAX_CONNECTIONS:
+            return False
+        STREAM_CONNECTIONS += 1
+        return True
+
+
+def _release_stream_slot():
+    global STREAM_CONNECTIONS
+    with STREAM_LOCK:
+        STREAM_CONNECTIONS = max(STREAM_CONNECTIONS - 1, 0)
+
+
+def _unsubscribe(keys: list[str], subscriber):
+    with STREAM_LOCK:
+        for key in keys:
+            subscribers = STREAM_SUBSCRIBERS.get(key)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscriber)
+            if not subscribers:
+                STREAM_SUBSCRIBERS.pop(key, None)
+
+
+def _format_sse(event: dict):
+    return f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+
 @app.get("/")
 def index():
     return jsonify(
         {
             "name": "stock-agent-api",
             "status": "ok",
-            "endpoints": ["/health", "/train", "/predict"],
+            "endpoints": ["/health", "/train", "/predict", "/stream", "/models"],
         }
     )
 
@@ -88,14 +225,65 @@ def index():
 @app.get("/health")
 def health():
     default_model = model_path_for_ticker("AAPL", period=DEFAULT_PREDICT_PERIOD)
+    try:
+        models_registered = registry.count_models()
+    except Exception:
+        models_registered = None
     return jsonify(
         {
             "status": "ok",
             "model_ready": default_model.exists(),
+            "models_registered": models_registered,
         }
     )
 
 
+@app.get("/models")
+def models():
+    payload, status = _models_payload(request.args)
+    return jsonify(payload), status
+
+
+def _models_payload(args):
+    max_age_hours = args.get("max_age_hours")
+    trained_after = args.get("trained_after")
+    min_quality_ratio = args.get("min_quality_ratio")
+    limit = args.get("limit")
+    now = datetime.now(timezone.utc)
+
+    # Both age filters become one trained_at cutoff in SQL, so `limit` applies to the filtered rows.
+    cutoffs = []
+    if max_age_hours is not None:
+        try:
+            cutoffs.append(now - timedelta(hours=float(max_age_hours)))
+        except ValueError:
+            return {"error": "max_age_hours must be a number."}, 400
+    if trained_after is not None:
+        try:
+            cutoff = datetime.fromisoformat(trained_after)
+        except ValueError:
+            return {"error": "trained_after must be an ISO-8601 timestamp."}, 400
+        # Timestamps without an offset are UTC, like trained_at.
+        cutoffs.append(cutoff if cutoff.tzinfo else cutoff.replace(tzinfo=timezone.utc))
+
+    try:
+        entries = registry.list_models(
+            ticker=args.get("ticker"),
+            period=args.get("period"),
+            trained_after=max(cutoffs).astimezone(timezone.utc).isoformat() if cutoffs else None,
+            min_quality_ratio=float(min_quality_ratio) if min_quality_ratio is not None else None,
+            limit=int(limit) if limit is not None else None,
+        )
+    except Exception as error:
+        return {"error": str(error)}, 400
+
+    for entry in entries:
+        age = registry.age_seconds(entry, now=now)
+        entry["age_hours"] = round(age / 3600.0, 2) if age is not None else None
+
+    return {"count": len(entries), "models": entries}, 200
+
+
 @app.route("/train", methods=["GET", "POST"])
 def train():
     ticker = request.args.get("ticker", "AAPL")
@@ -156,5 +344,62 @@ def predict():
         return jsonify({"error": str(error)}), 400
 
 
+def _stream_keys(args):
+    # Returns (cache keys, error message) for the tickers/period query of a /stream request.
+    raw_tickers = args.get("tickers", args.get("ticker", "AAPL"))
+    period = args.get("period", DEFAULT_PREDICT_PERIOD)
+
+    tickers = []
+    for raw_ticker in raw_tickers.split(","):
+        normalized = raw_ticker.upper().strip()
+        if normalized and normalized not in tickers:
+            tickers.append(normalized)
+
+    if not tickers:
+        return None, "At least one ticker is required."
+    if len(tickers) > STREAM_MAX_TICKERS:
+        return None, f"Too many tickers (max {STREAM_MAX_TICKERS})."
+
+    return [_cache_key(ticker, period) for ticker in tickers], None
+
+
+@app.get("/stream")
+def stream():
+    keys, error = _stream_keys(request.args)
+    if error:
+        return jsonify({"error": error}), 400
+
+    # Shed streams before they exhaust the worker's threads and starve /predict.
+    if not _acquire_stream_slot():
+        response = jsonify(
+            {"error": f"Too many open streams on this worker (max {STREAM_MAX_CONNECTIONS}). Retry later or use the async server."}
+        )
+        response.headers["Retry-After"] = str(int(STREAM_REFRESH_SECONDS))
+        return response, 503
+
+    subscriber = _subscribe(keys)
+
+    def generate():
+        yield f"retry: {int(STREAM_REFRESH_SECONDS * 1000)}\n\n"
+        while True:
+            try:
+                event = subscriber.get(timeout=STREAM_HEARTBEAT_SECONDS)
+            except queue.Empty:
+                # Comment line keeps proxies from closing an idle connection.
+                yield ": keep-alive\n\n"
+                continue
+            yield _format_sse(event)
+
+    def close():
+        _unsubscribe(keys, subscriber)
+        _release_stream_slot()
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    response = Response(stream_with_context(generate()), mimetype="text/event-stream", headers=headers)
+    # Runs when the connection closes, even if the generator never started (a finally inside it would not).
+    response.call_on_close(close)
+    return response
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=int(os.getenv("PORT", "5000")), debug=False)
\ No newline at end of file
@@ -0,0 +1,194 @@
+import asyncio
+import os
+import queue
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+# Reuse the Flask app's prediction cache, stream hub and /models logic so both servers behave the same.
+from app.api import (
+    PREDICT_AUTO_TRAIN_ON_MISS,
+    PREDICT_CACHE_TTL_SECONDS,
+    STREAM_HEARTBEAT_SECONDS,
+    STREAM_REFRESH_SECONDS,
+    _format_sse,
+    _get_cached_prediction,
+    _invalidate_cache_for_ticker,
+    _models_payload,
+    _set_cached_prediction,
+    _stream_keys,
+    _subscribe,
+    _unsubscribe,
+)
+from src import registry
+from src.config import DEFAULT_PREDICT_PERIOD, DEFAULT_TRAIN_PERIOD, model_path_for_ticker
+from src.fetch import fetch_stock_data
+from src.main import plan_run, run_on_data
+
+
+# Network fetches mostly wait on Yahoo, so they get a wide pool; they never run on the event loop.
+ASYNC_FETCH_WORKERS = int(os.getenv("ASYNC_FETCH_WORKERS", "64"))
+# CPU-bound work (features, train, predict) gets a small bounded pool so it cannot oversubscribe cores.
+ASYNC_CPU_WORKERS = int(os.getenv("ASYNC_CPU_WORKERS", str(os.cpu_count() or 2)))
+# How often an idle /stream connection checks its queue.
+STREAM_POLL_SECONDS = 0.5
+
+FETCH_POOL = ThreadPoolExecutor(max_workers=ASYNC_FETCH_WORKERS, thread_name_prefix="async-fetch")
+CPU_POOL = ThreadPoolExecutor(max_workers=ASYNC_CPU_WORKERS, thread_name_prefix="async-cpu")
+
+
+async def _run_async(ticker, period, force_retrain):
+    # Same pipeline as src.main.run, but each phase runs on the matching executor.
+    loop = asyncio.get_running_loop()
+    plan = plan_run(ticker=ticker, period=period, force_retrain=force_retrain)
+    data = await loop.run_in_executor(FETCH_POOL, fetch_stock_data, plan["ticker"], plan["fetch_period"])
+    return await loop.run_in_executor(CPU_POOL, run_on_data, plan, data)
+
+
+async def index(request):
+    return JSONResponse(
+        {
+            "name": "stock-agent-api",
+            "status": "ok",
+            "endpoints": ["/health", "/train", "/predict", "/stream", "/models"],
+        }
+    )
+
+
+async def health(request):
+    default_model = model_path_for_ticker("AAPL", period=DEFAULT_PREDICT_PERIOD)
+    try:
+        models_registered = await asyncio.get_running_loop().run_in_executor(FETCH_POOL, registry.count_models)
+    except Exception:
+        models_registered = None
+    return JSONResponse(
+        {
+            "status": "ok",
+            "model_ready": default_model.exists(),
+            "models_registered": models_registered,
+        }
+    )
+
+
+async def models(request):
+    payload, status = await asyncio.get_running_loop().run_in_executor(FETCH_POOL, _models_payload, request.query_params)
+    return JSONResponse(payload, status_code=status)
+
+
+async def train(request):
+    ticker = request.query_params.get("ticker", "AAPL")
+    period = request.query_params.get("period", DEFAULT_TRAIN_PERIOD)
+
+    try:
+        result = await _run_async(ticker=ticker, period=period, force_retrain=True)
+        _invalidate_cache_for_ticker(ticker)
+        result["cached"] = False
+        return JSONResponse(result)
+    except Exception as error:
+        return JSONResponse({"error": str(error)}, status_code=400)
+
+
+async def predict(request):
+    ticker = request.query_params.get("ticker", "AAPL")
+    period = request.query_params.get("period", DEFAULT_PREDICT_PERIOD)
+    retrain = request.query_params.get("retrain", "false").lower() == "true"
+
+    auto_trained = False
+
+    try:
+        if not retrain and PREDICT_CACHE_TTL_SECONDS > 0:
+            cached = _get_cached_prediction(ticker=ticker, period=period)
+            if cached is not None:
+                return JSONResponse(cached)
+
+        try:
+            result = await _run_async(ticker=ticker, period=period, force_retrain=retrain)
+        except FileNotFoundError as missing_model_error:
+            if not retrain and not PREDICT_AUTO_TRAIN_ON_MISS:
+                return JSONResponse(
+                    {
+                        "error": str(missing_model_error),
+                        "needs_training": True,
+                        "suggestion": "Call /train first or retry /predict with retrain=true.",
+                    },
+                    status_code=409,
+                )
+            result = await _run_async(ticker=ticker, period=period, force_retrain=True)
+            auto_trained = True
+
+        if retrain or auto_trained:
+            _invalidate_cache_for_ticker(ticker)
+
+        result["cached"] = False
+        result["cache_ttl_seconds"] = PREDICT_CACHE_TTL_SECONDS
+        result["auto_trained"] = auto_trained
+
+        if not retrain and PREDICT_CACHE_TTL_SECONDS > 0:
+            _set_cached_prediction(ticker=ticker, period=period, result=result)
+
+        return JSONResponse(result)
+    except Exception as error:
+        return JSONResponse({"error": str(error)}, status_code=400)
+
+
+async def stream(request):
+    keys, error = _stream_keys(request.query_params)
+    if error:
+        return JSONResponse({"error": error}, status_code=400)
+
+    async def generate():
+        # Same shared refresh loop as the Flask app; this connection only drains its own queue.
+        # Subscribing inside the generator ties the subscription to the finally below, even when the
+        # client disconnects before the first chunk.
+        subscriber = _subscribe(keys)
+        try:
+            yield f"retry: {int(STREAM_REFRESH_SECONDS * 1000)}\n\n"
+            idle_seconds = 0.0
+            while True:
+                try:
+                    event = subscriber.get_nowait()
+                except queue.Empty:
+                    await asyncio.sleep(STREAM_POLL_SECONDS)
+                    idle_seconds += STREAM_POLL_SECONDS
+                    if idle_seconds >= STREAM_HEARTBEAT_SECONDS:
+                        # Comment line keeps proxies from closing an idle connection.
+                        idle_seconds = 0.0
+                        yield ": keep-alive\n\n"
+                    continue
+                idle_seconds = 0.0
+                yield _format_sse(event)
+        finally:
+            _unsubscribe(keys, subscriber)
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(generate(), media_type="text/event-stream", headers=headers)
+
+
+app = Starlette(
+    routes=[
+        Route("/", index),
+        Route("/health", health),
+        Route("/models", models),
+        Route("/train", train, methods=["GET", "POST"]),
+        Route("/predict", predict),
+        Route("/stream", stream),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])],
+)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", "5000")))
@@ -0,0 +1,122 @@
+"""Concurrency check for the ASGI server with a slow simulated market-data provider.
+
+Usage:
+    python app/asgi_load_test.py [--requests 32] [--concurrency 32] [--latency 2.0]
+
+Trains a few synthetic tickers into a temporary MODELS_DIR, then replaces yf.download with a stub
+that sleeps --latency seconds and fires concurrent /predict calls (cache disabled) at app.asgi.
+With non-blocking fetches the wall time stays close to one provider round trip instead of
+requests x latency.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Isolate artifacts and disable caching before any project module reads its configuration.
+os.environ.setdefault("MODELS_DIR", tempfile.mkdtemp(prefix="stock-agent-loadtest-"))
+os.environ["PREDICT_CACHE_TTL_SECONDS"] = "0"
+os.environ.setdefault("N_ESTIMATORS", "20")
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import numpy as np
+import pandas as pd
+import uvicorn
+
+import src.fetch as fetch_module
+
+
+TICKERS = ["LT1", "LT2", "LT3", "LT4"]
+PROVIDER_LATENCY = {"seconds": 0.0}
+# Upstream traffic during the measured phase: yf.download calls, and the per-symbol HTTP requests yfinance
+# would send for them (a batched download still costs one request per symbol).
+UPSTREAM_CALLS = {"downloads": 0, "symbol_requests": 0}
+
+
+def fake_download(symbols, period="1y", **kwargs):
+    # Deterministic random-walk bars; sleeps to simulate a slow provider.
+    # A list of symbols (batched fetch) returns one column group per symbol, like group_by="ticker".
+    UPSTREAM_CALLS["downloads"] += 1
+    UPSTREAM_CALLS["symbol_requests"] += len(symbols) if isinstance(symbols, (list, tuple)) else 1
+    time.sleep(PROVIDER_LATENCY["seconds"])
+    if isinstance(symbols, (list, tuple)):
+        return pd.concat({symbol: _fake_bars(symbol, period) for symbol in symbols}, axis=1)
+    return _fake_bars(symbols, period)
+
+
+def _fake_bars(symbol, period):
+    rows = 260 if not str(period).endswith("d") else max(int(int(period[:-1]) * 5 / 7), 60)
+    rng = np.random.default_rng(sum(map(ord, symbol)))
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=rows)
+    return pd.DataFrame({"Close": close, "Volume": rng.integers(1_000_000, 2_000_000, rows).astype(float)}, index=index)
+
+
+def _get(url):
+    started = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=120) as response:
+        payload = json.loads(response.read())
+    return time.perf_counter() - started, payload
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=2.0, help="simulated provider latency in seconds")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    fetch_module.yf.download = fake_download
+
+    from src.main import run
+
+    # Train once without latency so the measured phase is pure predict traffic.
+    for ticker in TICKERS:
+        run(ticker=ticker, period="1y", force_retrain=True)
+
+    from app.asgi import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    PROVIDER_LATENCY["seconds"] = args.latency
+    UPSTREAM_CALLS.update(downloads=0, symbol_requests=0)
+    urls = [
+        f"http://127.0.0.1:{args.port}/predict?ticker={TICKERS[position % len(TICKERS)]}&period=1y"
+        for position in range(args.requests)
+    ]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(_get, urls))
+    wall = time.perf_counter() - started
+
+    server.should_exit = True
+    thread.join(timeout=5)
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, payload in results if "error" in payload)
+    print(f"requests={args.requests} concurrency={args.concurrency} provider_latency={args.latency:g}s")
+    print(f"wall={wall:.2f}s throughput={args.requests / wall:.1f} req/s errors={errors}")
+    print(f"upstream: downloads={UPSTREAM_CALLS['downloads']} symbol_requests={UPSTREAM_CALLS['symbol_requests']}")
+    print(f"p50={np.percentile(latencies, 50):.2f}s p99={np.percentile(latencies, 99):.2f}s")
+    print(f"fully serialized would take ~{args.requests * args.latency:.0f}s")
+    return 0 if errors == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+"""Capacity test of the Flask API under gunicorn against a local stand-in for Yahoo Finance.
+
+Usage:
+    python app/load_test.py [--workers 2] [--threads 16] [--requests 200] [--concurrency 16]
+                            [--latency 0.2] [--error-rate 0.05] [--scenarios predict,mixed,retrain-heavy]
+                            [--label baseline] [--out load_test_results.jsonl]
+
+Starts a stub market-data server (deterministic random-walk bars, configurable latency and error rate),
+runs `gunicorn app.api:app` with MARKET_DATA_URL pointing at it and a temporary MODELS_DIR, trains every
+ticker once, then drives each scenario's mix of /predict, /predict?retrain=true and /train.
+Per scenario it reports throughput, p50/p99 latency, error rate and /predict cache hit rate, and appends
+one JSON line per scenario to --out so runs with different settings can be compared.
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# Request mix per scenario: endpoint -> weight.
+SCENARIOS = {
+    "predict": {"predict": 1.0},
+    "mixed": {"predict": 0.8, "retrain": 0.15, "train": 0.05},
+    "retrain-heavy": {"predict": 0.5, "retrain": 0.25, "train": 0.25},
+}
+
+DEFAULT_TICKERS = ["LT1", "LT2", "LT3", "LT4", "LT5", "LT6", "LT7", "LT8"]
+
+# Trading rows per period unit for the stub bars.
+ROWS_PER_UNIT = {"d": 5 / 7, "wk": 5, "mo": 21, "y": 252}
+
+
+def stub_bars(symbol, period):
+    # Deterministic random walk per symbol, ending today.
+    period = str(period).strip().lower()
+    rows = 2600
+    for unit, per_unit in ROWS_PER_UNIT.items():
+        if period.endswith(unit) and period[: -len(unit)].isdigit():
+            rows = max(int(int(period[: -len(unit)]) * per_unit), 1)
+            break
+    rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=rows)
+    return pd.DataFrame(
+        {
+            "Open": close,
+            "High": close * 1.01,
+            "Low": close * 0.99,
+            "Close": close,
+            "Adj Close": close,
+            "Volume": rng.integers(1_000_000, 2_000_000, rows).astype(float),
+        },
+        index=index.strftime("%Y-%m-%d"),
+    )
+
+
+def start_stub_server(latency, error_rate):
+    # GET /bars?symbols=A,B&period=1y -> {symbol: DataFrame.to_dict("split")}, the MARKET_DATA_URL contract.
+    stats = {"requests": 0, "errors": 0, "symbols": 0}
+    stats_lock = threading.Lock()
+    rng = random.Random(7)
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            query = urllib.parse.parse_qs(url.query)
+            symbols = [symbol for symbol in query.get("symbols", [""])[0].split(",") if symbol]
+            period = query.get("period", ["1y"])[0]
+
+            time.sleep(latency)
+            with stats_lock:
+                stats["requests"] += 1
+                stats["symbols"] += len(symbols)
+                failed = rng.random() < error_rate
+                if failed:
+                    stats["errors"] += 1
+
+            if url.path != "/bars" or failed:
+                self.send_response(503 if failed else 404)
+                self.end_headers()
+                return
+
+            body = json.dumps({symbol: stub_bars(symbol, period).to_dict("split") for symbol in symbols}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats, stats_lock
+
+
+def start_gunicorn(args, port, market_data_url, models_dir):
+    environment = dict(os.environ)
+    environment.update(
+        {
+            "MARKET_DATA_URL": market_data_url,
+            "MODELS_DIR": models_dir,
+            "N_ESTIMATORS": str(args.n_estimators),
+            "PREDICT_CACHE_TTL_SECONDS": str(args.cache_ttl),
+        }
+    )
+    command = [
+        sys.executable, "-m", "gunicorn", "app.api:app",
+        "--workers", str(args.workers),
+        "--worker-class", "gthread",
+        "--threads", str(args.threads),
+        "--bind", f"127.0.0.1:{port}",
+        "--timeout", "120",
+        "--log-level", "warning",
+    ]
+    # The pipeline prints every prediction to stdout; keep stderr for gunicorn errors.
+    process = subprocess.Popen(command, cwd=ROOT_DIR, env=environment, stdout=subprocess.DEVNULL)
+
+    # Wait until every worker can answer /health.
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with code {process.returncode}")
+        try:
+            _request(f"http://127.0.0.1:{port}/health")
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("gunicorn did not become ready within 60s")
+
+
+def _request(url):
+    # (status, payload, seconds); HTTP error statuses are results, not exceptions.
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=120) as response:
+            status, body = response.status, response.read()
+    except urllib.error.HTTPError as error:
+        status, body = error.code, error.read()
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        payload = {}
+    return status, payload, time.perf_counter() - started
+
+
+def build_urls(base_url, mix, tickers, period, count, seed):
+    rng = random.Random(seed)
+    kinds = rng.choices(list(mix), weights=list(mix.values()), k=count)
+    urls = []
+    for kind in kinds:
+        ticker = rng.choice(tickers)
+        if kind == "train":
+            urls.append((kind, f"{base_url}/train?ticker={ticker}&period={period}"))
+        elif kind == "retrain":
+            urls.append((kind, f"{base_url}/predict?ticker={ticker}&period={period}&retrain=true"))
+        else:
+            urls.append((kind, f"{base_url}/predict?ticker={ticker}&period={period}"))
+    return urls
+
+
+def run_scenario(base_url, name, args, tickers):
+    urls = build_urls(base_url, SCENARIOS[name], tickers, args.period, args.requests, seed=zlib.crc32(name.encode()))
+
+    def call(item):
+        kind, url = item
+        try:
+            status, payload, seconds = _request(url)
+        except OSError as error:
+            return kind, None, {"error": str(error)}, None
+        return kind, status, payload, seconds
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(call, urls))
+    wall = time.perf_counter() - started
+
+    latencies = [seconds for _, _, _, seconds in results if seconds is not None]
+    errors = sum(1 for _, status, _, _ in results if status is None or status >= 400)
+    predicts = [payload for kind, status, payload, _ in results if kind == "predict" and status == 200]
+    cache_hits = sum(1 for payload in predicts if payload.get("cached"))
+
+    return {
+        "scenario": name,
+        "mix": SCENARIOS[name],
+        "requests": len(urls),
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(urls) / wall, 2) if wall > 0 else None,
+        "p50_seconds": round(float(np.percentile(latencies, 50)), 4) if latencies else None,
+        "p99_seconds": round(float(np.percentile(latencies, 99)), 4) if latencies else None,
+        "error_rate": round(errors / len(urls), 4) if urls else 0.0,
+        "cache_hit_rate": round(cache_hits / len(predicts), 4) if predicts else None,
+    }
+
+
+def _free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn worker processes")
+    parser.add_argument("--threads", type=int, default=16, help="threads per gunicorn worker")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub provider latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="fraction of stub responses that fail with 503")
+    parser.add_argument("--tickers", default=",".join(DEFAULT_TICKERS))
+    parser.add_argument("--period", default="1y")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--n-estimators", type=int, default=40, help="N_ESTIMATORS for the API under test")
+    parser.add_argument("--cache-ttl", type=int, default=60, help="PREDICT_CACHE_TTL_SECONDS for the API under test")
+    parser.add_argument("--label", default="", help="free text stored with the results (e.g. branch or setting)")
+    parser.add_argument("--out", default="load_test_results.jsonl", help="JSON lines file results are appended to")
+    args = parser.parse_args(argv)
+
+    tickers = [ticker.strip().upper() for ticker in args.tickers.split(",") if ticker.strip()]
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}; choose from {', '.join(SCENARIOS)}")
+
+    stub, stub_stats, stub_lock = start_stub_server(args.latency, args.error_rate)
+    market_data_url = f"http://127.0.0.1:{stub.server_address[1]}"
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+
+    with tempfile.TemporaryDirectory(prefix="stock-agent-loadtest-") as models_dir:
+        server = start_gunicorn(args, port, market_data_url, models_dir)
+        try:
+            # Every ticker has an artifact before measuring, so /predict never hits the train-on-miss path.
+            for ticker in tickers:
+                _request(f"{base_url}/train?ticker={ticker}&period={args.period}")
+
+            records = []
+            for name in scenarios:
+                with stub_lock:
+                    before = dict(stub_stats)
+                record = run_scenario(base_url, name, args, tickers)
+                with stub_lock:
+                    record["upstream_requests"] = stub_stats["requests"] - before["requests"]
+                    record["upstream_errors"] = stub_stats["errors"] - before["errors"]
+                records.append(record)
+                print(
+                    f"{name:<14} {record['throughput_rps']:>7} req/s  p50={record['p50_seconds']}s "
+                    f"p99={record['p99_seconds']}s  errors={record['error_rate']:.1%}  "
+                    f"cache_hits={record['cache_hit_rate']}  upstream={record['upstream_requests']}"
+                )
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+            stub.shutdown()
+
+    settings = {
+        "label": args.label,
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "workers": args.workers,
+        "threads": args.threads,
+        "concurrency": args.concurrency,
+        "stub_latency_seconds": args.latency,
+        "stub_error_rate": args.error_rate,
+        "tickers": len(tickers),
+        "period": args.period,
+        "n_estimators": args.n_estimators,
+        "cache_ttl_seconds": args.cache_ttl,
+    }
+    with open(args.out, "a", encoding="utf-8") as handle:
+        for record in records:
+            handle.write(json.dumps({**settings, **record}) + "\n")
+    print(f"Results appended to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+import atexit
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import time
+
+import joblib  # Artifacts are joblib pickles; used for atomic writes and validation.
+
+try:
+    # Package-style import path (works when running inside module/package context).
+    from .config import (
+        ARTIFACT_GC_INTERVAL_SECONDS,
+        ARTIFACT_PATTERNS,
+        FEATURE_CACHE_DIR,
+        FEATURE_CACHE_PATTERN,
+        MODELS_DIR,
+        MODELS_DISK_BUDGET_MB,
+    )
+    from . import registry
+except ImportError:
+    # Script-style fallback import (works when running this file directly).
+    from config import (
+        ARTIFACT_GC_INTERVAL_SECONDS,
+        ARTIFACT_PATTERNS,
+        FEATURE_CACHE_DIR,
+        FEATURE_CACHE_PATTERN,
+        MODELS_DIR,
+        MODELS_DISK_BUDGET_MB,
+    )
+    import registry
+
+
+# Suffix for in-progress writes; never matches ARTIFACT_PATTERNS so readers cannot pick them up.
+TEMP_SUFFIX = ".tmp"
+# Temp files older than this are leftovers from crashed writers and safe to delete.
+STALE_TEMP_SECONDS = 3600
+# Permissions of written artifacts; mkstemp creates 0600 files, joblib.dump(path) used to leave them 0644.
+ARTIFACT_FILE_MODE = 0o644
+
+# Last-load times are only needed for LRU eviction, so they are tracked only when a budget or the background
+# maintenance is configured. Loads are batched in memory and written to the registry by flush_load_times
+# (maintenance loop, enforce_budget, process exit), never on the prediction path.
+LOAD_TRACKING_ENABLED = MODELS_DISK_BUDGET_MB > 0 or ARTIFACT_GC_INTERVAL_SECONDS > 0
+PENDING_LOADS = {}
+PENDING_LOADS_LOCK = threading.Lock()
+
+
+def atomic_dump(artifact, model_path):
+    # Write to a temp file in the same folder, then rename over the target.
+    # os.replace is atomic on one filesystem, so a concurrent load_artifact sees either the old
+    # complete pickle or the new complete pickle, never a half-written one.
+    model_path.parent.mkdir(parents=True, exist_ok=True)
+    file_descriptor, temp_name = tempfile.mkstemp(
+        dir=model_path.parent,
+        prefix=f".{model_path.name}.",
+        suffix=TEMP_SUFFIX,
+    )
+    try:
+        with os.fdopen(file_descriptor, "wb") as handle:
+            joblib.dump(artifact, handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.chmod(temp_name, ARTIFACT_FILE_MODE)
+        os.replace(temp_name, model_path)
+    except BaseException:
+        # Never leave a partial temp file behind on failure.
+        try:
+            os.unlink(temp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def artifact_files():
+    # Every per-ticker and pooled artifact plus every feature cache file currently on disk.
+    files = set()
+    for pattern in ARTIFACT_PATTERNS:
+        files.update(MODELS_DIR.glob(pattern))
+    files.update(FEATURE_CACHE_DIR.glob(FEATURE_CACHE_PATTERN))
+    return sorted(files)
+
+
+def record_load(model_path):
+    # Remember when an artifact was last used (LRU eviction input); a dict update, no I/O.
+    if not LOAD_TRACKING_ENABLED:
+        return
+    with PENDING_LOADS_LOCK:
+        PENDING_LOADS[str(model_path)] = time.time()
+
+
+def flush_load_times():
+    # Write the batched last-load times to the registry; on failure they are kept for the next flush.
+    with PENDING_LOADS_LOCK:
+        pending = dict(PENDING_LOADS)
+        PENDING_LOADS.clear()
+    if not pending:
+        return
+    try:
+        registry.touch_artifacts(pending)
+    except Exception:
+        with PENDING_LOADS_LOCK:
+            for model_file, loaded_at in pending.items():
+                PENDING_LOADS.setdefault(model_file, loaded_at)
+
+
+def enforce_budget(max_bytes=None, dry_run=False):
+    # Evict least-recently-used artifacts until total artifact size fits the budget.
+    # "Used" = last load for prediction, or the write time for artifacts never loaded since training.
+    if max_bytes is None:
+        max_bytes = int(MODELS_DISK_BUDGET_MB * 1024 * 1024)
+    if max_bytes <= 0:
+        return []
+
+    flush_load_times()
+    last_loaded = registry.last_loaded_times()
+    entries = []
+    for model_path in artifact_files():
+        try:
+            stat = model_path.stat()
+        except FileNotFoundError:
+            continue
+        last_used = max(stat.st_mtime, last_loaded.get(str(model_path), 0.0))
+        entries.append((last_used, stat.st_size, model_path))
+
+    total = sum(size for _, size, _ in entries)
+    evicted = []
+
+    # Oldest use first; the most recently used artifact is always kept.
+    for _, size, model_path in sorted(entries, key=lambda entry: entry[0])[:-1]:
+        if total <= max_bytes:
+            break
+        if not dry_run:
+            _remove_artifact(model_path)
+        evicted.append(str(model_path))
+        total -= size
+
+    return evicted
+
+
+def collect_garbage(dry_run=False, validate=True):
+    # Remove stale temp files, registry rows whose file is gone, and artifacts that fail to load.
+    # validate=True unpickles every artifact once, so only the CLI runs it (never per request or per worker).
+    removed = {"temp_files": [], "orphaned_entries": [], "invalid_artifacts": []}
+    now = time.time()
+
+    # Leftovers from interrupted atomic writes.
+    temp_paths = set(MODELS_DIR.glob(f"*{TEMP_SUFFIX}")) | set(FEATURE_CACHE_DIR.glob(f"*{TEMP_SUFFIX}"))
+    for temp_path in sorted(temp_paths):
+        try:
+            if now - temp_path.stat().st_mtime < STALE_TEMP_SECONDS:
+                continue
+            if not dry_run:
+                temp_path.unlink()
+        except FileNotFoundError:
+            continue
+        removed["temp_files"].append(str(temp_path))
+
+    # Registry/usage rows pointing at files that no longer exist.
+    flush_load_times()
+    indexed_files = {entry["model_file"] for entry in registry.list_models()}
+    indexed_files.update(registry.last_loaded_times().keys())
+    for model_file in sorted(indexed_files):
+        if os.path.exists(model_file):
+            continue
+        if not dry_run:
+            registry.remove_file_entries(model_file)
+        removed["orphaned_entries"].append(model_file)
+
+    # Unreadable/incomplete artifacts (e.g. written by an older non-atomic writer or a crashed process).
+    if validate:
+        for model_path in artifact_files():
+            if _is_valid_artifact(model_path):
+                continue
+            if not dry_run:
+                _remove_artifact(model_path)
+            removed["invalid_artifacts"].append(str(model_path))
+
+    return removed
+
+
+def start_background_maintenance(interval_seconds=None):
+    # Optional daemon thread running garbage collection + budget enforcement periodically.
+    # Returns the thread, or None when disabled (interval <= 0).
+    interval_seconds = ARTIFACT_GC_INTERVAL_SECONDS if interval_seconds is None else interval_seconds
+    if interval_seconds <= 0:
+        return None
+
+    def maintenance_loop():
+        while True:
+            time.sleep(interval_seconds)
+            try:
+                # Runs in every API worker, so it never unpickles the store; validation is the CLI's job.
+                collect_garbage(validate=False)
+                enforce_budget()
+            except Exception:
+                # Maintenance is best-effort; try again next interval.
+                pass
+
+    thread = threading.Thread(target=maintenance_loop, name="artifact-maintenance", daemon=True)
+    thread.start()
+    return thread
+
+
+# Pending load times of an exiting worker still reach the registry.
+atexit.register(flush_load_times)
+
+
+def _is_valid_artifact(model_path):
+    # Only clear corruption counts as invalid: a truncated/garbled pickle or an unexpected layout.
+    # Anything else (MemoryError, a class missing after an sklearn upgrade, I/O hiccups) keeps the file.
+    try:
+        artifact = joblib.load(model_path)
+    except (EOFError, pickle.UnpicklingError, KeyError):
+        # KeyError is joblib's (pure-Python unpickler's) reply to an unknown opcode, i.e. garbage bytes.
+        return False
+    except Exception:
+        return True
+    if not isinstance(artifact, dict):
+        return False
+    # Feature cache entries carry bars + features instead of models.
+    if model_path.parent == FEATURE_CACHE_DIR:
+        return "bars" in artifact and "features" in artifact
+    return "price_model" in artifact
+
+
+def _remove_artifact(model_path):
+    try:
+        model_path.unlink()
+    except FileNotFoundError:
+        pass
+    registry.remove_file_entries(model_path)
+
+
+def main(argv=None):
+    # CLI: python -m src.artifacts [--budget-mb N] [--no-validate] [--dry-run]
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Garbage-collect model artifacts and enforce the disk budget.")
+    parser.add_argument("--budget-mb", type=float, default=MODELS_DISK_BUDGET_MB, help="disk budget in MB (0 = unlimited)")
+    parser.add_argument("--no-validate", action="store_true", help="skip loading artifacts to detect invalid ones")
+    parser.add_argument("--dry-run", action="store_true", help="report what would be removed without deleting")
+    args = parser.parse_args(argv)
+
+    removed = collect_garbage(dry_run=args.dry_run, validate=not args.no_validate)
+    evicted = enforce_budget(max_bytes=int(args.budget_mb * 1024 * 1024), dry_run=args.dry_run)
+
+    action = "Would remove" if args.dry_run else "Removed"
+    for label, paths in removed.items():
+        print(f"{action} {len(paths)} {label.replace('_', ' ')}")
+        for path in paths:
+            print(f"  {path}")
+    print(f"{action} {len(evicted)} artifact(s) to fit {args.budget_mb:g} MB budget")
+    for path in evicted:
+        print(f"  {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
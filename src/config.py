@@ -1,14 +1,34 @@
+import math
 import os
+import re
 from pathlib import Path
 
 
 # Build an absolute path to this repository root (portable across Windows/Linux/macOS).
 # __file__ = current file location, resolve() = absolute path, parent.parent = move from src/config.py to project root.
 BASE_DIR = Path(__file__).resolve().parent.parent
-# Keep all trained model artifacts in one dedicated folder under project root.
-MODELS_DIR = BASE_DIR / "models"
+# Keep all trained model artifacts in one dedicated folder under project root (overridable for tests/deployments).
+MODELS_DIR = Path(os.getenv("MODELS_DIR", str(BASE_DIR / "models")))
 # Default single-model path (legacy/general fallback path).
 MODEL_PATH = MODELS_DIR / "model.pkl"
+# SQLite index of trained artifacts (ticker, period, metrics, size...) readable without unpickling models.
+REGISTRY_PATH = MODELS_DIR / "registry.sqlite3"
+# Glob patterns of every artifact file kind stored in MODELS_DIR (per-ticker and pooled).
+ARTIFACT_PATTERNS = ("model_*.pkl", "pooled_*.pkl")
+# Disk budget for all artifacts; least-recently-used ones are evicted above it (0 = unlimited).
+MODELS_DISK_BUDGET_MB = float(os.getenv("MODELS_DISK_BUDGET_MB", "0"))
+# Interval of the optional background artifact garbage collection/eviction task in the API (0 = disabled).
+ARTIFACT_GC_INTERVAL_SECONDS = float(os.getenv("ARTIFACT_GC_INTERVAL_SECONDS", "0"))
+# Persisted engineered-feature cache (one file per ticker) so train/predict calls on already seen bars skip
+# feature engineering and new daily bars only compute their own rows.
+FEATURE_CACHE_ENABLED = os.getenv("FEATURE_CACHE_ENABLED", "true").lower() == "true"
+FEATURE_CACHE_DIR = Path(os.getenv("FEATURE_CACHE_DIR", str(MODELS_DIR / "features")))
+# Glob pattern of feature cache files in FEATURE_CACHE_DIR; they count against the disk budget and GC too.
+FEATURE_CACHE_PATTERN = "features_*.pkl"
+# Cache entries also kept in process memory (per worker) to skip the disk read on hot tickers.
+FEATURE_CACHE_MEMORY_ENTRIES = int(os.getenv("FEATURE_CACHE_MEMORY_ENTRIES", "64"))
+# Version of the artifact dict layout written by train_model (bump when keys change meaning).
+ARTIFACT_VERSION = 1
 
 # Ordered list of engineered input features used by both training and inference.
 # Keeping this in config guarantees train/predict use the exact same feature schema.
@@ -37,23 +57,84 @@ FEATURE_COLUMNS = [
 	"VolumeChange",
 ]
 
+# Price-level indicators; pooled (cross-ticker) models rescale these by Close so they are ticker-agnostic.
+PRICE_LEVEL_FEATURES = ["MA10", "MA20", "MA50", "EMA12", "EMA26", "MACD"]
+
+# Longest rolling window used by add_features (MA50): rows needed before the first complete feature row.
+FEATURE_WARMUP_ROWS = 50
+# Extra trading rows fetched for inference on top of the warm-up, so EMA12/EMA26 converge
+# and recent close history is available. Inference only needs the last feature row.
+INFERENCE_MARGIN_ROWS = int(os.getenv("INFERENCE_MARGIN_ROWS", "50"))
+
+# Pooled mode: one model trained on many tickers (relative features, return target) serves any symbol
+# that has no per-ticker artifact of its own.
+USE_POOLED_MODEL = os.getenv("USE_POOLED_MODEL", "false").lower() == "true"
+# Tree shape (max_depth, min_samples_leaf) of the pooled forests. Unbounded trees on every stacked row grow
+# with the pooled row count and end up as large as all per-ticker artifacts together.
+POOLED_TREE_SHAPE = (
+    int(os.getenv("POOLED_MAX_DEPTH", "12")),
+    int(os.getenv("POOLED_MIN_SAMPLES_LEAF", "8")),
+)
+
 # Train/test split for time-ordered data (80% train, 20% test).
 TRAIN_SPLIT_RATIO = 0.8
 # Fixed random seed for reproducible model training behavior.
 RANDOM_STATE = 42
 # Number of trees in RandomForest; read from environment for production tuning without code edits.
 N_ESTIMATORS = int(os.getenv("N_ESTIMATORS", "120"))
+# Serving budgets for budgeted training (0 = no budget): serialized size of both forests and single-row
+# predict latency of regressor + classifier. With a budget set, training shrinks the forests until they fit.
+MODEL_SIZE_BUDGET_MB = float(os.getenv("MODEL_SIZE_BUDGET_MB", "0"))
+PREDICT_LATENCY_BUDGET_MS = float(os.getenv("PREDICT_LATENCY_BUDGET_MS", "0"))
+# Tree shapes tried in order under a budget: (max_depth, min_samples_leaf); None depth = unbounded trees.
+BUDGET_TREE_SHAPES = [(None, 1), (16, 2), (12, 4), (8, 8), (6, 16)]
+# Fewest trees a budgeted forest is pruned to before the next, smaller tree shape is tried.
+BUDGET_MIN_TREES = int(os.getenv("BUDGET_MIN_TREES", "20"))
+# Expanding-window time-series cross-validation folds for per-ticker training (0/1 = single 80/20 split only).
+# Fold metrics are aggregated and drive quality_ratio, use_baseline and blend_weight instead of the one split.
+CV_FOLDS = int(os.getenv("CV_FOLDS", "0"))
+# Threads fitting CV folds side by side (forest fitting releases the GIL); 0 = one per fold, capped at CPU count.
+CV_WORKERS = int(os.getenv("CV_WORKERS", "0"))
 # Minimum number of rows required before allowing training (guards against tiny/unstable datasets).
 # 6-month windows typically produce fewer usable rows after feature engineering, so this default is lower.
 MIN_ROWS_FOR_TRAINING = int(os.getenv("MIN_ROWS_FOR_TRAINING", "60"))
 # Forecast horizon in days (1 means predict next trading day's close).
 TARGET_HORIZON_DAYS = 1
+# Horizons (trading days) learned together by one multi-output model, e.g. "1,5,20".
+# The first/shortest horizon is the primary forecast reported at the top level of responses.
+TARGET_HORIZONS = [int(value) for value in os.getenv("TARGET_HORIZONS", str(TARGET_HORIZON_DAYS)).split(",") if value.strip()]
 # Data period used when explicitly training (environment-overridable for flexible deployments).
 DEFAULT_TRAIN_PERIOD = os.getenv("DEFAULT_TRAIN_PERIOD", "6mo")
 # Data period used for regular prediction requests (can be lighter than training period).
 DEFAULT_PREDICT_PERIOD = os.getenv("DEFAULT_PREDICT_PERIOD", "1y")
 # Maximum allowed wait time for Yahoo Finance fetches to prevent hanging requests.
 YFINANCE_FETCH_TIMEOUT_SECONDS = float(os.getenv("YFINANCE_FETCH_TIMEOUT_SECONDS", "12"))
+# Overall time budget for one fetch_stock_data call across all candidates and retries (bounds tail latency).
+FETCH_DEADLINE_SECONDS = float(os.getenv("FETCH_DEADLINE_SECONDS", "25"))
+# Exponential backoff between retries: random delay in [0, min(max, base * 2^attempt)] seconds.
+FETCH_BACKOFF_BASE_SECONDS = float(os.getenv("FETCH_BACKOFF_BASE_SECONDS", "0.5"))
+FETCH_BACKOFF_MAX_SECONDS = float(os.getenv("FETCH_BACKOFF_MAX_SECONDS", "4"))
+# Size of the shared thread pool running concurrent download attempts.
+FETCH_MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", "16"))
+# Optional HTTP market-data source used instead of Yahoo Finance (e.g. the load-test stub server or an
+# internal mirror): GET <url>/bars?symbols=A,B&period=1y returning {symbol: DataFrame.to_dict("split")}.
+MARKET_DATA_URL = os.getenv("MARKET_DATA_URL", "").strip()
+# Micro-batching window: fetches for the same period arriving within it share one multi-symbol download
+# (0 disables batching and every fetch downloads its own symbol).
+FETCH_BATCH_WINDOW_MS = float(os.getenv("FETCH_BATCH_WINDOW_MS", "25"))
+# Upper bound of symbols per batched download; a full batch is sent without waiting for the window.
+FETCH_BATCH_MAX_SYMBOLS = int(os.getenv("FETCH_BATCH_MAX_SYMBOLS", "50"))
+# Token bucket for upstream yf.download calls per process (rate 0 = unlimited); burst = bucket size.
+FETCH_RATE_LIMIT_PER_SECOND = float(os.getenv("FETCH_RATE_LIMIT_PER_SECOND", "5"))
+FETCH_RATE_LIMIT_BURST = int(os.getenv("FETCH_RATE_LIMIT_BURST", "10"))
+# How long a ticker that returned no data fails fast without hitting Yahoo again (0 disables).
+FETCH_NEGATIVE_CACHE_TTL_SECONDS = float(os.getenv("FETCH_NEGATIVE_CACHE_TTL_SECONDS", "600"))
+# Low-memory mode keeps only the raw columns the pipeline needs and stores engineered features as float32.
+# This halves the size of engineered frames held in memory. It does not lower the peak memory of a bulk
+# training, which the forests dominate (see README).
+LOW_MEMORY_MODE = os.getenv("LOW_MEMORY_MODE", "false").lower() == "true"
+# Raw market columns required by feature engineering (everything else is dropped in low-memory mode).
+LOW_MEMORY_COLUMNS = ["Close", "Volume"]
 
 # If model quality ratio is below this threshold, system uses stronger baseline fallback behavior.
 BASELINE_HARD_CUTOFF = 0.6
@@ -75,4 +156,40 @@ def model_path_for_ticker(ticker: str, period: str | None = None) -> Path:
 	# Normalize period to avoid invalid path characters and accidental whitespace mismatches.
 	normalized_period = str(period).strip().replace("/", "_").replace(" ", "")
 	# Return period-specific model path so each ticker+period has its own artifact.
-	return MODELS_DIR / f"model_{normalized_ticker}_{normalized_period}.pkl"
\ No newline at end of file
+	return MODELS_DIR / f"model_{normalized_ticker}_{normalized_period}.pkl"
+
+
+def feature_cache_path_for(ticker: str) -> Path:
+	# One cache file per ticker; every fetch window (training period, inference window) is a slice of it.
+	normalized_ticker = (ticker or "AAPL").upper().strip().replace("/", "_")
+	return FEATURE_CACHE_DIR / f"features_{normalized_ticker}.pkl"
+
+
+def pooled_model_path(period: str) -> Path:
+	# Single cross-ticker artifact per period (prefix differs from per-ticker "model_" files on purpose).
+	normalized_period = str(period).strip().replace("/", "_").replace(" ", "")
+	return MODELS_DIR / f"pooled_{normalized_period}.pkl"
+
+
+def inference_period_for(period: str | None = None) -> str:
+	# Prediction only needs enough history to compute features for the latest row, so fetch a small
+	# window instead of the artifact's full training period (which still selects the model file).
+	trading_rows = FEATURE_WARMUP_ROWS + INFERENCE_MARGIN_ROWS
+	# Trading days -> calendar days (5 trading days per week) plus a buffer for market holidays.
+	window_days = math.ceil(trading_rows * 7 / 5) + 10
+
+	# Never fetch more than the requested period itself when it is already shorter than the window.
+	requested_days = _period_days(period)
+	if requested_days is not None and requested_days <= window_days:
+		return str(period).strip()
+
+	return f"{window_days}d"
+
+
+def _period_days(period: str | None) -> int | None:
+	# Approximate calendar length of yfinance-style periods ("10d", "6mo", "1y"); None for "ytd"/"max"/unknown.
+	match = re.fullmatch(r"(\d+)(d|wk|mo|y)", str(period or "").strip().lower())
+	if match is None:
+		return None
+	unit_days = {"d": 1, "wk": 7, "mo": 31, "y": 366}
+	return int(match.group(1)) * unit_days[match.group(2)]
@@ -0,0 +1,270 @@
+import threading
+from collections import OrderedDict
+
+import joblib  # Cache entries are joblib pickles like the model artifacts.
+import numpy as np
+import pandas as pd
+
+try:
+    # Package-style import path (works when running inside module/package context).
+    from .artifacts import atomic_dump, record_load
+    from .config import (
+        FEATURE_CACHE_ENABLED,
+        FEATURE_CACHE_MEMORY_ENTRIES,
+        FEATURE_COLUMNS,
+        FEATURE_WARMUP_ROWS,
+        LOW_MEMORY_MODE,
+        feature_cache_path_for,
+    )
+    from .features import add_features, exponential_average
+except ImportError:
+    # Script-style fallback import (works when running this file directly).
+    from artifacts import atomic_dump, record_load
+    from config import (
+        FEATURE_CACHE_ENABLED,
+        FEATURE_CACHE_MEMORY_ENTRIES,
+        FEATURE_COLUMNS,
+        FEATURE_WARMUP_ROWS,
+        LOW_MEMORY_MODE,
+        feature_cache_path_for,
+    )
+    from features import add_features, exponential_average
+
+
+# Version of the cache entry layout; entries written by another version are recomputed.
+FEATURE_CACHE_VERSION = 3
+
+# Most recently used entries per process, keyed by cache file path (one per ticker).
+MEMORY_CACHE = OrderedDict()
+MEMORY_CACHE_LOCK = threading.Lock()
+
+
+def cached_features(data, ticker, low_memory=None, exact=False):
+    # Drop-in replacement for add_features(data) backed by one cache entry per ticker.
+    # The entry holds the longest known bar history and its features; a requested window whose bars line up
+    # (by date) with the cached ones is served from it, whatever period it was fetched with.
+    # The result always has the rows add_features(data) would return (the window's own warm-up rows dropped):
+    #   - a window starting at the cached history's first bar is a plain slice, identical to add_features;
+    #   - a window starting later is derived: EMAs are re-anchored to the window's first bar, equal to
+    #     add_features up to floating-point rounding;
+    #   - exact=True (training) accepts only the identical slice and otherwise computes add_features(data),
+    #     so an artifact never depends on what happened to be cached.
+    # Returns (features, status) where status is:
+    #   "hit"      served from the cached features, no feature engineering at all
+    #   "append"   the bars continue the cached history (new days / revised last bar), only those rows computed
+    #   "miss"     computed from scratch (new ticker, no date overlap, history changed, exact request...)
+    #   "disabled" FEATURE_CACHE_ENABLED is off
+    low_memory = LOW_MEMORY_MODE if low_memory is None else bool(low_memory)
+    if not FEATURE_CACHE_ENABLED:
+        return add_features(data, low_memory=low_memory), "disabled"
+
+    path = feature_cache_path_for(ticker)
+    bars = data.copy()
+    entry = _load_entry(path)
+
+    if entry is not None and not _entry_matches(entry, low_memory):
+        entry = None
+
+    alignment = None if entry is None else _align(entry["bars"], bars)
+
+    if alignment is not None:
+        kept_rows, matched_rows = alignment
+        start = kept_rows - matched_rows
+
+        # Requested window lies entirely inside the cached history.
+        if matched_rows == len(bars):
+            features = _derive_window(entry, data, start, exact)
+            if features is not None:
+                return features, "hit"
+            # Only a one-pass computation from the cached first bar is worth storing (it is exact for next time).
+            if not (exact and start == 0):
+                return add_features(data, low_memory=low_memory), "miss"
+
+        # The window continues the cached history: keep its first kept_rows bars, append the rest.
+        # An exact request from the cached first bar recomputes anyway, so its result replaces the entry below.
+        if kept_rows > FEATURE_WARMUP_ROWS and not (exact and start == 0):
+            combined = pd.concat([entry["bars"].iloc[:kept_rows], bars.iloc[matched_rows:]])
+            try:
+                features, ema = _extend(entry, combined, kept_rows, low_memory)
+            except ValueError:
+                features = None
+            if features is not None:
+                entry = _new_entry(combined, ema, features, low_memory, min(entry["exact_rows"], kept_rows))
+                _store_entry(path, entry)
+                # Appended rows carry rolling-window rounding from their context, so exact requests recompute.
+                window = _derive_window(entry, data, start, exact=False) if not exact else None
+                if window is not None:
+                    return window, "append"
+                return add_features(data, low_memory=low_memory), "miss"
+
+    features = add_features(data, low_memory=low_memory)
+    _store_entry(path, _new_entry(bars, _ema_columns(bars), features, low_memory, len(bars)))
+    return features.copy(), "miss"
+
+
+def _new_entry(bars, ema, features, low_memory, exact_rows):
+    # exact_rows: leading bars whose features came from one add_features pass over the history (appended
+    # rows carry a little rounding from their warm-up context and are not bit-identical to a recompute).
+    return {
+        "cache_version": FEATURE_CACHE_VERSION,
+        "feature_set": list(FEATURE_COLUMNS),
+        "low_memory": low_memory,
+        "bars": bars,
+        "ema": ema,
+        "features": features,
+        "exact_rows": exact_rows,
+    }
+
+
+def _derive_window(entry, bars, start, exact):
+    # add_features(bars) for a window whose bars equal cached bars[start : start + len(bars)]; None when the
+    # cached entry cannot reproduce it (caller recomputes).
+    if start == 0:
+        # Same first bar: every indicator is computed left to right, so the slice is identical.
+        if exact and len(bars) > entry["exact_rows"]:
+            return None
+        return _window(entry["features"], bars)
+    if exact or len(bars) < FEATURE_WARMUP_ROWS or bars.isna().to_numpy().any():
+        return None
+
+    # The window's own warm-up: MA50 needs FEATURE_WARMUP_ROWS bars, every other lookback is shorter.
+    features = _window(entry["features"], bars.iloc[FEATURE_WARMUP_ROWS - 1 :])
+    if len(features) != len(bars) - (FEATURE_WARMUP_ROWS - 1):
+        return None
+
+    # EMA with adjust=False starts at the first close; a later start only shifts the recurrence by a
+    # geometrically decaying offset: ema_window[t] = ema_cached[t] - (1 - alpha)^(t - start) * (ema_cached[start] - close[start]).
+    positions = np.arange(start + FEATURE_WARMUP_ROWS - 1, start + len(bars))
+    first_close = float(_close_series(bars).iloc[0])
+    ema = {}
+    for column, span, position in (("EMA12", 12, 0), ("EMA26", 26, 1)):
+        cached = entry["ema"][:, position]
+        decay = (1.0 - 2.0 / (span + 1)) ** (positions - start)
+        ema[column] = cached[positions] - decay * (cached[start] - first_close)
+
+    for column in ("EMA12", "EMA26"):
+        features[column] = ema[column].astype(features[column].dtype)
+    features["MACD"] = (ema["EMA12"] - ema["EMA26"]).astype(features["MACD"].dtype)
+    return features
+
+
+def _align(cached_bars, bars):
+    # Line up the requested bars with the cached history by date.
+    # Returns (kept_rows, matched_rows): the first `matched_rows` requested bars equal cached bars
+    # cached_bars[start : kept_rows]; None when the window starts before/outside the cached history.
+    if list(cached_bars.columns) != list(bars.columns) or bars.empty or cached_bars.empty:
+        return None
+
+    start = cached_bars.index.searchsorted(bars.index[0])
+    if start >= len(cached_bars) or cached_bars.index[start] != bars.index[0]:
+        return None
+
+    rows = min(len(cached_bars) - start, len(bars))
+    same_dates = cached_bars.index[start : start + rows] == bars.index[:rows]
+    old_values = cached_bars.to_numpy()[start : start + rows]
+    new_values = bars.to_numpy()[:rows]
+    # Missing values (NaN) on both sides count as equal, like DataFrame.equals.
+    same_values = ((old_values == new_values) | (pd.isna(old_values) & pd.isna(new_values))).all(axis=1)
+
+    mismatches = np.flatnonzero(~(same_dates & same_values))
+    matched_rows = int(mismatches[0]) if len(mismatches) else rows
+    return start + matched_rows, matched_rows
+
+
+def _window(features, bars):
+    # Feature rows inside the requested window's date range (a copy, the cached frame stays untouched).
+    index = features.index
+    first = index.searchsorted(bars.index[0])
+    last = index.searchsorted(bars.index[-1], side="right")
+    return features.iloc[first:last].copy()
+
+
+def _extend(entry, bars, prefix_rows, low_memory):
+    # Recompute features for bars[prefix_rows:] from a context that starts FEATURE_WARMUP_ROWS bars earlier.
+    # Rolling indicators only look back FEATURE_WARMUP_ROWS bars; both EMAs continue from the stored
+    # EMA of the bar before the context, so new rows match a full recompute.
+    context_start = prefix_rows - FEATURE_WARMUP_ROWS
+    seed = entry["ema"][context_start - 1]
+    context = bars.iloc[context_start:].copy()
+
+    new_rows = add_features(context, low_memory=low_memory, ema_seed=(seed[0], seed[1]))
+    new_rows = new_rows[new_rows.index.isin(bars.index[prefix_rows:])]
+
+    cached = entry["features"]
+    kept_rows = cached[cached.index.isin(bars.index[:prefix_rows])]
+
+    close = _close_series(bars)
+    tail_ema = np.column_stack(
+        [
+            exponential_average(close.iloc[prefix_rows:], 12, seed=entry["ema"][prefix_rows - 1][0]).to_numpy(),
+            exponential_average(close.iloc[prefix_rows:], 26, seed=entry["ema"][prefix_rows - 1][1]).to_numpy(),
+        ]
+    )
+    ema = np.vstack([entry["ema"][:prefix_rows], tail_ema])
+
+    return pd.concat([kept_rows, new_rows]), ema
+
+
+def _ema_columns(bars):
+    # Float64 EMA12/EMA26 for every bar (before the NaN warm-up drop): seeds for later appends.
+    close = _close_series(bars)
+    return np.column_stack(
+        [exponential_average(close, 12).to_numpy(dtype=np.float64), exponential_average(close, 26).to_numpy(dtype=np.float64)]
+    )
+
+
+def _close_series(bars):
+    close = bars["Close"]
+    if getattr(close, "ndim", 1) == 2:
+        close = close.iloc[:, 0]
+    return close
+
+
+def _entry_matches(entry, low_memory):
+    return (
+        isinstance(entry, dict)
+        and entry.get("cache_version") == FEATURE_CACHE_VERSION
+        and entry.get("feature_set") == list(FEATURE_COLUMNS)
+        and entry.get("low_memory") == low_memory
+    )
+
+
+def _load_entry(path):
+    key = str(path)
+    with MEMORY_CACHE_LOCK:
+        entry = MEMORY_CACHE.get(key)
+        if entry is not None:
+            MEMORY_CACHE.move_to_end(key)
+    if entry is not None:
+        # Keeps hot tickers' files from being evicted by the disk budget.
+        record_load(path)
+        return entry
+
+    # A missing or unreadable file is just a cache miss.
+    try:
+        entry = joblib.load(path)
+    except Exception:
+        return None
+
+    _remember(key, entry)
+    record_load(path)
+    return entry
+
+
+def _store_entry(path, entry):
+    _remember(str(path), entry)
+    # Persisting is best-effort; a failed write must never fail the request.
+    try:
+        atomic_dump(entry, path)
+    except Exception:
+        pass
+
+
+def _remember(key, entry):
+    if FEATURE_CACHE_MEMORY_ENTRIES <= 0:
+        return
+    with MEMORY_CACHE_LOCK:
+        MEMORY_CACHE[key] = entry
+        MEMORY_CACHE.move_to_end(key)
+        while len(MEMORY_CACHE) > FEATURE_CACHE_MEMORY_ENTRIES:
+            MEMORY_CACHE.popitem(last=False)
@@ -1,4 +1,20 @@
-def add_features(data):
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .config import FEATURE_COLUMNS, LOW_MEMORY_MODE, PRICE_LEVEL_FEATURES
+except ImportError:
+    from config import FEATURE_COLUMNS, LOW_MEMORY_MODE, PRICE_LEVEL_FEATURES
+
+
+def add_features(data, low_memory=None, ema_seed=None):
+	# low_memory=None follows config LOW_MEMORY_MODE; True stores engineered columns as float32.
+	# ema_seed=(EMA12, EMA26) of the bar just before `data` continues both EMAs from earlier bars
+	# (used by the feature cache to compute only appended bars).
+    low_memory = LOW_MEMORY_MODE if low_memory is None else bool(low_memory)
+
 	# Ensure mandatory market price column exists; all other indicators depend on Close.
     if "Close" not in data.columns:
         raise ValueError("Input data is missing required column: Close")
@@ -17,8 +33,8 @@ def add_features(data):
     data["MA50"] = close.rolling(50).mean()
 
 	# Exponential moving averages give more weight to recent prices.
-    data["EMA12"] = close.ewm(span=12, adjust=False).mean()
-    data["EMA26"] = close.ewm(span=26, adjust=False).mean()
+    data["EMA12"] = exponential_average(close, 12, seed=None if ema_seed is None else ema_seed[0])
+    data["EMA26"] = exponential_average(close, 26, seed=None if ema_seed is None else ema_seed[1])
 	# MACD measures momentum shift using fast and slow EMA difference.
     data["MACD"] = data["EMA12"] - data["EMA26"]
 
@@ -52,6 +68,11 @@ def add_features(data):
 		# If no volume is available, keep feature present with neutral constant.
         data["VolumeChange"] = 0.0
 
+	# Indicators are computed in float64 for precision, then stored at half the width in low-memory mode.
+    if low_memory:
+        for column in FEATURE_COLUMNS:
+            data[column] = data[column].astype(np.float32)
+
 	# Remove rows with NaN introduced by rolling windows/pct_change warm-up periods.
     data.dropna(inplace=True)
 
@@ -60,4 +81,57 @@ def add_features(data):
         raise ValueError("Feature engineering produced no rows. Try using a longer data period.")
 
 	# Return the enriched dataframe ready for model training/inference.
-    return data
\ No newline at end of file
+    return data
+
+
+def exponential_average(close, span, seed=None):
+	# EMA with adjust=False; a seed value is the EMA of the previous bar, so the recurrence continues
+	# exactly where an earlier computation over preceding bars stopped.
+    if seed is None:
+        return close.ewm(span=span, adjust=False).mean()
+    seeded = pd.Series(np.concatenate(([float(seed)], close.to_numpy(dtype=np.float64))))
+    values = seeded.ewm(span=span, adjust=False).mean().to_numpy()[1:]
+    return pd.Series(values, index=close.index, name=close.name)
+
+
+def data_fingerprint(data):
+	# Short stable hash of the bars a model/feature set was computed from:
+	# row dates, Close (and Volume when present) plus the feature schema.
+    digest = hashlib.sha256()
+    digest.update(",".join(FEATURE_COLUMNS).encode())
+    digest.update(np.asarray(data.index.asi8 if hasattr(data.index, "asi8") else range(len(data)), dtype=np.int64).tobytes())
+    for column in ("Close", "Volume"):
+        if column not in data.columns:
+            continue
+        values = data[column]
+        if getattr(values, "ndim", 1) == 2:
+            values = values.iloc[:, 0]
+        digest.update(values.to_numpy(dtype=np.float64).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def feature_matrix(data, rows=slice(None), columns=None, relative=False):
+	# Model input matrix for the selected rows, filled column by column into one float32 Fortran-ordered
+	# array: forests cast inputs to float32 internally anyway and column-major layout is what the tree
+	# splitter scans, so sklearn needs no extra copy.
+	# relative=True rescales price-level indicators by Close (MA/EMA -> distance from price, MACD -> fraction
+	# of price) so rows from differently priced tickers are comparable in one pooled model.
+    columns = list(columns or FEATURE_COLUMNS)
+
+    close = None
+    if relative:
+        close = data["Close"]
+        if getattr(close, "ndim", 1) == 2:
+            close = close.iloc[:, 0]
+        close = close.to_numpy(dtype=np.float64)[rows]
+
+    first = data[columns[0]].to_numpy()[rows]
+    matrix = np.empty((len(first), len(columns)), dtype=np.float32, order="F")
+    for position, column in enumerate(columns):
+        values = data[column].to_numpy()[rows]
+        if relative and column == "MACD":
+            values = values / close
+        elif relative and column in PRICE_LEVEL_FEATURES:
+            values = (values / close) - 1.0
+        matrix[:, position] = values
+    return matrix
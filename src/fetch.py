@@ -1,11 +1,51 @@
 # Import the yfinance library.
 # This library allows Python to download stock data from Yahoo Finance.
+import json
+import random
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
 import yfinance as yf
+from yfinance.data import YfData
+import pandas as pd
 
 try:
-    from .config import DEFAULT_PREDICT_PERIOD, YFINANCE_FETCH_TIMEOUT_SECONDS
+    from .config import (
+        DEFAULT_PREDICT_PERIOD,
+        FETCH_BACKOFF_BASE_SECONDS,
+        FETCH_BATCH_MAX_SYMBOLS,
+        FETCH_BATCH_WINDOW_MS,
+        FETCH_BACKOFF_MAX_SECONDS,
+        FETCH_DEADLINE_SECONDS,
+        FETCH_MAX_WORKERS,
+        FETCH_NEGATIVE_CACHE_TTL_SECONDS,
+        FETCH_RATE_LIMIT_BURST,
+        FETCH_RATE_LIMIT_PER_SECOND,
+        LOW_MEMORY_COLUMNS,
+        LOW_MEMORY_MODE,
+        MARKET_DATA_URL,
+        YFINANCE_FETCH_TIMEOUT_SECONDS,
+    )
 except ImportError:
-    from config import DEFAULT_PREDICT_PERIOD, YFINANCE_FETCH_TIMEOUT_SECONDS
+    from config import (
+        DEFAULT_PREDICT_PERIOD,
+        FETCH_BACKOFF_BASE_SECONDS,
+        FETCH_BATCH_MAX_SYMBOLS,
+        FETCH_BATCH_WINDOW_MS,
+        FETCH_BACKOFF_MAX_SECONDS,
+        FETCH_DEADLINE_SECONDS,
+        FETCH_MAX_WORKERS,
+        FETCH_NEGATIVE_CACHE_TTL_SECONDS,
+        FETCH_RATE_LIMIT_BURST,
+        FETCH_RATE_LIMIT_PER_SECOND,
+        LOW_MEMORY_COLUMNS,
+        LOW_MEMORY_MODE,
+        MARKET_DATA_URL,
+        YFINANCE_FETCH_TIMEOUT_SECONDS,
+    )
 
 
 # This dictionary is used if a ticker symbol needs an alternative name.
@@ -18,14 +58,43 @@ TICKER_FALLBACKS = {
 }
 
 
+# Shared pool for concurrent download attempts (original ticker + fallback run side by side).
+# Module-level so every request reuses the same bounded set of threads.
+FETCH_EXECUTOR = ThreadPoolExecutor(max_workers=FETCH_MAX_WORKERS, thread_name_prefix="fetch")
+
+# Negative cache: (ticker, period) -> monotonic time until which it is known to return no data.
+# Lets typo/delisted symbols fail immediately instead of spending the whole retry budget again.
+# Only symbols the provider confirms as unknown are cached; empty responses from outages never are.
+NEGATIVE_CACHE = {}
+NEGATIVE_CACHE_LOCK = threading.Lock()
+# Yahoo chart endpoint and the chart error codes it returns for a symbol it does not know.
+YAHOO_CHART_URL = "https://query2.finance.yahoo.com/v8/finance/chart/{symbol}"
+UNKNOWN_SYMBOL_CODES = ("not found",)
+
+# Micro-batching dispatcher state: period -> batch still accepting symbols.
+# The first caller of a batch (the leader) waits for the window, downloads every collected symbol in one
+# call and hands each waiting caller its own slice.
+OPEN_BATCHES = {}
+BATCH_LOCK = threading.Lock()
+
+# Token bucket shared by every upstream request of this process; a batched download costs one token per symbol.
+RATE_LIMIT_STATE = {"tokens": float(FETCH_RATE_LIMIT_BURST), "updated": time.monotonic()}
+RATE_LIMIT_LOCK = threading.Lock()
+
+
 # This function downloads stock data.
 # ticker  → stock symbol (default: AAPL)
 # period  → how much historical data (default: config default period)
-# retries → how many times to try if download fails
-def fetch_stock_data(ticker="AAPL", period=None, retries=3):
+# retries → how many times to try each candidate if download fails
+# low_memory → keep only the columns the pipeline needs (None = use LOW_MEMORY_MODE)
+def fetch_stock_data(ticker="AAPL", period=None, retries=3, low_memory=None):
 
     ticker = (ticker or "AAPL").upper().strip()
     period = (period or DEFAULT_PREDICT_PERIOD).strip()
+    low_memory = LOW_MEMORY_MODE if low_memory is None else bool(low_memory)
+
+    # Fail fast for symbols that were recently confirmed unknown.
+    _check_negative_cache(ticker, period)
 
     # Will store the downloaded stock data (as a table/DataFrame)
     data = None
@@ -45,48 +114,56 @@ def fetch_stock_data(ticker="AAPL", period=None, retries=3):
         ticker_candidates.append(fallback)
 
 
-    # Try each possible ticker (original + fallback if exists)
-    for current_ticker in ticker_candidates:
-
-        # Try downloading multiple times if needed
-        for _ in range(retries):
-            try:
-                # Download stock data from Yahoo Finance
-                # Example periods: "6mo", "1y", "5y"
-                # progress=False hides progress bar
-                # auto_adjust=False keeps raw prices (no dividend adjustment)
-                data = yf.download(
-                    current_ticker,
-                    period=period,
-                    progress=False,
-                    auto_adjust=False,
-                    timeout=YFINANCE_FETCH_TIMEOUT_SECONDS,
-                )
-
-                # If we successfully received non-empty data, stop retrying
-                if data is not None and not data.empty:
-                    break
-
-            # If something goes wrong (internet issue, invalid ticker, etc.)
-            except Exception as error:
-                # Save the error so we can show it later
-                last_error = error
-
-        # If we successfully downloaded data, stop trying other tickers
-        if data is not None and not data.empty:
-            break
+    # Overall time budget for this call, shared by every candidate and retry.
+    deadline = time.monotonic() + FETCH_DEADLINE_SECONDS
+
+    # Set once a winner is found (or we give up) so remaining attempts stop retrying.
+    stop = threading.Event()
+
+    # Try all candidates concurrently; the first non-empty result wins.
+    pending = {
+        FETCH_EXECUTOR.submit(_download_candidate, current_ticker, period, retries, deadline, stop)
+        for current_ticker in ticker_candidates
+    }
+
+    try:
+        while pending and data is None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                candidate_data, candidate_error = future.result()
+
+                if candidate_data is not None and data is None:
+                    data = candidate_data
+                elif candidate_error is not None:
+                    last_error = candidate_error
+    finally:
+        stop.set()
 
 
     # After trying everything, if still no data:
     if data is None or data.empty:
 
+        # Deadline hit while attempts were still running
+        if pending:
+            raise RuntimeError(
+                f"Failed to fetch stock data for {ticker}: timed out after {FETCH_DEADLINE_SECONDS:g}s"
+            )
+
         # If there was an actual error (like network failure)
         if last_error is not None:
             raise RuntimeError(
                 f"Failed to fetch stock data for {ticker}: {last_error}"
             )
 
-        # If no error but Yahoo returned nothing
+        # yf.download swallows network errors and timeouts and returns an empty frame, so an empty result alone
+        # proves nothing. Remember the symbol only when a lookup confirms the provider does not know it.
+        if _symbol_is_unknown(ticker, deadline):
+            _remember_missing_ticker(ticker, period)
         raise ValueError(
             f"No data returned for ticker '{ticker}'."
         )
@@ -108,6 +185,12 @@ def fetch_stock_data(ticker="AAPL", period=None, retries=3):
         data["Close"] = close.iloc[:, 0]
 
 
+    # In low-memory mode rebuild a slim frame with flat 1D columns only
+    # (drops Open/High/Low/Adj Close and the multi-level column structure).
+    if low_memory:
+        data = _keep_required_columns(data)
+
+
     # Remove rows that contain missing (NaN) values
     data.dropna(inplace=True)
 
@@ -120,4 +203,289 @@ def fetch_stock_data(ticker="AAPL", period=None, retries=3):
 
 
     # Return the cleaned stock data table
-    return data
\ No newline at end of file
+    return data
+
+
+# Build a new dataframe holding only LOW_MEMORY_COLUMNS as flat 1D columns.
+# Missing optional columns (e.g. Volume) are skipped; feature engineering handles them.
+def _keep_required_columns(data):
+
+    columns = {}
+
+    for column in LOW_MEMORY_COLUMNS:
+        values = data.get(column)
+
+        if values is None:
+            continue
+
+        # Same 2D guard as for Close above.
+        if getattr(values, "ndim", 1) == 2:
+            values = values.iloc[:, 0]
+
+        columns[column] = values
+
+    return pd.DataFrame(columns, index=data.index)
+
+
+# Download one candidate symbol with retries, backing off between attempts.
+# Returns (data, None) on success or (None, last_error) when all attempts failed or time ran out.
+def _download_candidate(symbol, period, retries, deadline, stop):
+
+    last_error = None
+
+    for attempt in range(retries):
+
+        # Stop when another candidate already won or the overall budget is spent
+        remaining = deadline - time.monotonic()
+        if stop.is_set() or remaining <= 0:
+            break
+
+        try:
+            # Download stock data from Yahoo Finance
+            # Example periods: "6mo", "1y", "5y"
+            # Goes through the dispatcher, which may merge it with concurrent fetches of other symbols
+            data = _dispatch_download(symbol, period, deadline)
+
+            # Non-empty data means success
+            if data is not None and not data.empty:
+                return data, None
+
+        # If something goes wrong (internet issue, invalid ticker, etc.)
+        except Exception as error:
+            last_error = error
+
+        # Exponential backoff with full jitter before the next attempt.
+        # stop.wait() doubles as an interruptible sleep.
+        if attempt < retries - 1:
+            delay = random.uniform(0, min(FETCH_BACKOFF_MAX_SECONDS, FETCH_BACKOFF_BASE_SECONDS * (2 ** attempt)))
+            stop.wait(min(delay, max(deadline - time.monotonic(), 0)))
+
+    return None, last_error
+
+
+# Fetch one symbol, sharing a multi-symbol download with other symbols requested for the same period
+# within FETCH_BATCH_WINDOW_MS. Returns the symbol's frame (same shape as a single-symbol download) or None.
+def _dispatch_download(symbol, period, deadline):
+
+    if FETCH_BATCH_WINDOW_MS <= 0:
+        _acquire_rate_tokens(1, deadline)
+        return _download_symbols([symbol], period, deadline).get(symbol)
+
+    with BATCH_LOCK:
+        batch = OPEN_BATCHES.get(period)
+        leader = batch is None
+
+        if leader:
+            batch = {
+                "symbols": [],
+                "full": threading.Event(),
+                "done": threading.Event(),
+                "results": {},
+                "error": None,
+            }
+            OPEN_BATCHES[period] = batch
+
+        if symbol not in batch["symbols"]:
+            batch["symbols"].append(symbol)
+
+        # A full batch stops accepting symbols; the next caller opens a new one
+        if len(batch["symbols"]) >= FETCH_BATCH_MAX_SYMBOLS:
+            OPEN_BATCHES.pop(period, None)
+            batch["full"].set()
+
+    if leader:
+        batch["full"].wait(FETCH_BATCH_WINDOW_MS / 1000)
+
+        with BATCH_LOCK:
+            if OPEN_BATCHES.get(period) is batch:
+                del OPEN_BATCHES[period]
+            symbols = list(batch["symbols"])
+
+        try:
+            # yfinance sends one HTTP request per symbol even in a multi-symbol download: one token each
+            _acquire_rate_tokens(len(symbols), deadline)
+            batch["results"] = _download_symbols(symbols, period, deadline)
+        except Exception as error:
+            batch["error"] = error
+        finally:
+            batch["done"].set()
+
+    elif not batch["done"].wait(max(deadline - time.monotonic(), 0)):
+        raise TimeoutError(f"Batched download for {symbol} did not finish before the deadline")
+
+    # Every caller of a failed batch sees the error and retries on its own schedule
+    if batch["error"] is not None:
+        raise batch["error"]
+
+    # Callers clean their frame in place and several may have asked for the same symbol: hand out copies
+    data = batch["results"].get(symbol)
+    return None if data is None else data.copy()
+
+
+# One upstream call for all symbols -> {symbol: frame or None}.
+def _download_symbols(symbols, period, deadline):
+
+    # progress=False hides progress bar
+    # auto_adjust=False keeps raw prices (no dividend adjustment)
+    # timeout never exceeds what is left of the overall deadline
+    timeout = min(YFINANCE_FETCH_TIMEOUT_SECONDS, max(deadline - time.monotonic(), 0.1))
+
+    if MARKET_DATA_URL:
+        return _download_from_market_data_url(symbols, period, timeout)
+
+    # A lone symbol keeps the exact original single-symbol call
+    if len(symbols) == 1:
+        data = yf.download(symbols[0], period=period, progress=False, auto_adjust=False, timeout=timeout)
+        return {symbols[0]: data}
+
+    data = yf.download(
+        symbols,
+        period=period,
+        progress=False,
+        auto_adjust=False,
+        timeout=timeout,
+        group_by="ticker",
+    )
+
+    results = {}
+
+    for symbol in symbols:
+        if data is None or data.empty or symbol not in data.columns.get_level_values(0):
+            results[symbol] = None
+            continue
+
+        # Dates are aligned across symbols, so drop rows where this symbol has no bar at all,
+        # then restore the (Price, Ticker) column layout of a single-symbol download.
+        part = data[symbol].dropna(how="all")
+        part.columns = pd.MultiIndex.from_product([part.columns, [symbol]], names=["Price", "Ticker"])
+        results[symbol] = part
+
+    return results
+
+
+# Same contract as _download_symbols, served by the MARKET_DATA_URL HTTP source instead of Yahoo.
+# HTTP errors raise, so they go through the normal retry/backoff path.
+def _download_from_market_data_url(symbols, period, timeout):
+
+    query = urllib.parse.urlencode({"symbols": ",".join(symbols), "period": period})
+
+    with urllib.request.urlopen(f"{MARKET_DATA_URL.rstrip('/')}/bars?{query}", timeout=timeout) as response:
+        payload = json.loads(response.read())
+
+    results = {}
+
+    for symbol in symbols:
+        bars = payload.get(symbol)
+
+        if not bars or not bars.get("data"):
+            results[symbol] = None
+            continue
+
+        # Same (Price, Ticker) column layout as a yfinance single-symbol download
+        data = pd.DataFrame(bars["data"], columns=bars["columns"], index=pd.to_datetime(bars["index"]))
+        data.columns = pd.MultiIndex.from_product([data.columns, [symbol]], names=["Price", "Ticker"])
+        results[symbol] = data
+
+    return results
+
+
+# Take `count` tokens from the upstream rate limiter (one per symbol request), waiting for refills as needed.
+# Tokens are collected as they become available, so a batch larger than the burst still gets through at
+# the configured rate. Raises TimeoutError when the deadline comes first.
+def _acquire_rate_tokens(count, deadline):
+
+    if FETCH_RATE_LIMIT_PER_SECOND <= 0:
+        return
+
+    needed = float(count)
+
+    while True:
+        with RATE_LIMIT_LOCK:
+            now = time.monotonic()
+            refill = (now - RATE_LIMIT_STATE["updated"]) * FETCH_RATE_LIMIT_PER_SECOND
+            RATE_LIMIT_STATE["tokens"] = min(float(FETCH_RATE_LIMIT_BURST), RATE_LIMIT_STATE["tokens"] + refill)
+            RATE_LIMIT_STATE["updated"] = now
+
+            taken = min(needed, float(int(RATE_LIMIT_STATE["tokens"])))
+            RATE_LIMIT_STATE["tokens"] -= taken
+            needed -= taken
+
+            if needed <= 0:
+                return
+
+            wait_seconds = (1 - RATE_LIMIT_STATE["tokens"]) / FETCH_RATE_LIMIT_PER_SECOND
+
+        if now + wait_seconds > deadline:
+            raise TimeoutError("Upstream rate limit: no download slot before the deadline")
+
+        time.sleep(wait_seconds)
+
+
+# Raise immediately if ticker+period is in the negative cache and its entry has not expired.
+def _check_negative_cache(ticker, period):
+
+    if FETCH_NEGATIVE_CACHE_TTL_SECONDS <= 0:
+        return
+
+    now = time.monotonic()
+
+    with NEGATIVE_CACHE_LOCK:
+        expires_at = NEGATIVE_CACHE.get((ticker, period))
+
+        if expires_at is None:
+            return
+
+        if now >= expires_at:
+            NEGATIVE_CACHE.pop((ticker, period), None)
+            return
+
+    raise ValueError(
+        f"No data returned for ticker '{ticker}' (unknown symbol; retry in {int(expires_at - now) + 1}s)."
+    )
+
+
+# Record a ticker the provider confirmed as unknown so repeated requests fail fast.
+def _remember_missing_ticker(ticker, period):
+
+    if FETCH_NEGATIVE_CACHE_TTL_SECONDS <= 0:
+        return
+
+    with NEGATIVE_CACHE_LOCK:
+        NEGATIVE_CACHE[(ticker, period)] = time.monotonic() + FETCH_NEGATIVE_CACHE_TTL_SECONDS
+
+
+# True only when the provider explicitly reports the symbol as unknown/delisted.
+# Network errors, rate limits, timeouts and an expired deadline all return False (never cached).
+def _symbol_is_unknown(ticker, deadline):
+
+    remaining = deadline - time.monotonic()
+
+    if remaining <= 0:
+        return False
+
+    # The HTTP source answered successfully without this symbol: that is its "unknown symbol" reply
+    if MARKET_DATA_URL:
+        try:
+            return _download_from_market_data_url([ticker], "5d", min(YFINANCE_FETCH_TIMEOUT_SECONDS, remaining)).get(ticker) is None
+        except Exception:
+            return False
+
+    # Yahoo answers a chart request for a symbol it does not know (typo, delisted ticker) with an explicit
+    # error: {"chart": {"result": null, "error": {"code": "Not Found", ...}}}. The chart endpoint is read
+    # directly: Ticker.history first spends extra timezone/quoteSummary lookups on such symbols and, depending on
+    # process-wide yfinance state, fails there with a plain HTTPError instead of the chart error.
+    # Transport errors, rate limits (YFRateLimitError) and any other reply are never treated as unknown.
+    try:
+        _acquire_rate_tokens(1, deadline)
+        response = YfData().get(
+            url=YAHOO_CHART_URL.format(symbol=urllib.parse.quote(ticker)),
+            params={"range": "5d", "interval": "1d"},
+            timeout=min(YFINANCE_FETCH_TIMEOUT_SECONDS, max(deadline - time.monotonic(), 0.1)),
+        )
+        error = ((response.json() or {}).get("chart") or {}).get("error") or {}
+    except Exception:
+        return False
+
+    return str(error.get("code", "")).lower() in UNKNOWN_SYMBOL_CODES
+
+    return False
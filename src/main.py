@@ -1,21 +1,52 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 try:
-    from .config import model_path_for_ticker
+    from .config import DEFAULT_TRAIN_PERIOD, USE_POOLED_MODEL, inference_period_for, model_path_for_ticker, pooled_model_path
     from .fetch import fetch_stock_data
-    from .features import add_features
-    from .train import train_model
+    from .feature_cache import cached_features
+    from .train import train_model, train_pooled_model
     from .predict import predict_price
 except ImportError:
-    from config import model_path_for_ticker
+    from config import DEFAULT_TRAIN_PERIOD, USE_POOLED_MODEL, inference_period_for, model_path_for_ticker, pooled_model_path
     from fetch import fetch_stock_data
-    from features import add_features
-    from train import train_model
+    from feature_cache import cached_features
+    from train import train_model, train_pooled_model
     from predict import predict_price
 
 
-def run(ticker="AAPL", period="5y", force_retrain=False):
+def run(ticker="AAPL", period="5y", force_retrain=False, verbose=True):
+    plan = plan_run(ticker=ticker, period=period, force_retrain=force_retrain)
+
+    if verbose:
+        print("Fetching stock data...")
+
+    data = fetch_stock_data(ticker=plan["ticker"], period=plan["fetch_period"])
+    return run_on_data(plan, data, verbose=verbose)
+
+
+# The pipeline is split in three phases so async servers can run the network fetch and the
+# CPU-bound work (features/train/predict) on different executors:
+#   plan_run (cheap, filesystem only) -> fetch_stock_data (network) -> run_on_data (CPU).
+def plan_run(ticker="AAPL", period="5y", force_retrain=False):
     ticker = (ticker or "AAPL").upper().strip()
     model_path = model_path_for_ticker(ticker, period=period)
 
+    # Pooled mode: tickers without their own artifact are served by the shared cross-ticker model.
+    use_pooled = (
+        USE_POOLED_MODEL
+        and not force_retrain
+        and not model_path.exists()
+        and pooled_model_path(period).exists()
+    )
+    if use_pooled:
+        model_path = pooled_model_path(period)
+
     # Fast-fail before network work when prediction is requested for an untrained model.
     # This prevents duplicate fetch+feature work when caller falls back to force_retrain=True.
     if not force_retrain and not model_path.exists():
@@ -23,10 +54,31 @@ def run(ticker="AAPL", period="5y", force_retrain=False):
             f"Model for ticker '{ticker}' not trained yet. Call /train first or use /predict?retrain=true."
         )
 
-    print("Fetching stock data...")
+    # Training needs the full period; prediction only the warm-up window for the latest feature row.
+    # The artifact is still selected by `period` either way.
+    fetch_period = period if force_retrain else inference_period_for(period)
+
+    return {
+        "ticker": ticker,
+        "period": period,
+        "force_retrain": force_retrain,
+        "model_path": model_path,
+        "use_pooled": use_pooled,
+        "fetch_period": fetch_period,
+    }
 
-    data = fetch_stock_data(ticker=ticker, period=period)
-    data = add_features(data)
+
+def run_on_data(plan, data, verbose=True):
+    ticker = plan["ticker"]
+    period = plan["period"]
+    force_retrain = plan["force_retrain"]
+    model_path = plan["model_path"]
+    use_pooled = plan["use_pooled"]
+    fetch_period = plan["fetch_period"]
+
+    # Engineered features come from the per-ticker cache; training and inference windows share one entry.
+    # Training only takes bit-identical cached rows, so an artifact never depends on the cache state.
+    data, feature_cache_status = cached_features(data, ticker=ticker, exact=force_retrain)
 
     trained = False
     artifact = None
@@ -35,7 +87,7 @@ def run(ticker="AAPL", period="5y", force_retrain=False):
         artifact = train_model(data, ticker=ticker, period=period)
         trained = True
     try:
-        prediction_info, loaded_artifact = predict_price(data, ticker=ticker, period=period)
+        prediction_info, loaded_artifact = predict_price(data, ticker=ticker, period=period, pooled=use_pooled)
     except ValueError as error:
         if "artifact format is invalid" not in str(error).lower() and "price model not found" not in str(error).lower():
             raise
@@ -80,22 +132,152 @@ def run(ticker="AAPL", period="5y", force_retrain=False):
         "model_trained": trained,
         "trained_at": artifact.get("trained_at") if artifact else None,
         "target_horizon_days": artifact.get("target_horizon_days") if artifact else 1,
+        "horizons": prediction_info.get("horizons"),
         "metrics": artifact.get("metrics") if artifact else None,
         "recent_close_prices": [float(value) for value in close.tail(30).tolist()],
         "data_source": "Yahoo Finance (yfinance)",
         "data_period": period,
+        "data_window": fetch_period,
+        "feature_cache": feature_cache_status,
         "data_rows": int(len(data)),
         "data_start": data_start,
         "data_end": data_end,
         "model_file": str(model_path),
+        "model_scope": "pooled" if use_pooled else "ticker",
     }
 
-    print(f"Current Price: {current:.2f}")
-    print(f"Predicted Price: {predicted:.2f}")
-    print(f"Decision: {decision}")
+    if verbose:
+        print(f"Current Price: {current:.2f}")
+        print(f"Predicted Price: {predicted:.2f}")
+        print(f"Decision: {decision}")
 
     return result
 
 
+def train_pooled(tickers, period="5y"):
+    # Fetch + engineer features for every ticker, then fit one shared model on all of them.
+    # Tickers that fail to download are recorded as skipped instead of aborting the batch.
+    datasets = {}
+    skipped = {}
+    for ticker in tickers:
+        ticker = (ticker or "").upper().strip()
+        if not ticker:
+            continue
+        try:
+            datasets[ticker], _ = cached_features(fetch_stock_data(ticker=ticker, period=period), ticker=ticker, exact=True)
+        except Exception as error:
+            skipped[ticker] = str(error)
+
+    if not datasets:
+        raise ValueError("No ticker data could be fetched for pooled training.")
+
+    artifact = train_pooled_model(datasets, period=period)
+    artifact["skipped_tickers"].update(skipped)
+    return artifact
+
+
+def read_tickers_file(path):
+    # One ticker per line (commas also accepted); blank lines and "#" comments are ignored.
+    tickers = []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            line = line.split("#", 1)[0]
+            for raw_ticker in line.split(","):
+                ticker = raw_ticker.upper().strip()
+                if ticker and ticker not in tickers:
+                    tickers.append(ticker)
+    return tickers
+
+
+def _batch_task(ticker, period, force_retrain):
+    # Runs inside a pool worker; modules are imported once per worker process and reused.
+    started = time.perf_counter()
+    try:
+        result = run(ticker=ticker, period=period, force_retrain=force_retrain, verbose=False)
+        return {"ticker": ticker, "ok": True, "elapsed_seconds": time.perf_counter() - started, "result": result}
+    except Exception as error:
+        return {
+            "ticker": ticker,
+            "ok": False,
+            "elapsed_seconds": time.perf_counter() - started,
+            "error": str(error),
+            "error_type": type(error).__name__,
+        }
+
+
+def run_batch(tickers, mode="predict", period=None, workers=None, out=None):
+    # Train or predict many tickers on a process pool, streaming one JSON line per ticker as it completes.
+    # Returns the summary dict (also printed to stderr by the CLI).
+    if mode not in {"train", "predict"}:
+        raise ValueError("mode must be 'train' or 'predict'.")
+
+    force_retrain = mode == "train"
+    # Artifacts are keyed by period, so both modes share one default: a bulk predict without --period
+    # must find the models a bulk train without --period just wrote.
+    period = period or DEFAULT_TRAIN_PERIOD
+    workers = max(int(workers or os.cpu_count() or 1), 1)
+    out = out or sys.stdout
+
+    errors = Counter()
+    succeeded = 0
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_batch_task, ticker, period, force_retrain) for ticker in tickers]
+        for future in as_completed(futures):
+            record = future.result()
+            out.write(json.dumps(record, default=str) + "\n")
+            out.flush()
+            if record["ok"]:
+                succeeded += 1
+            else:
+                errors[record["error_type"]] += 1
+
+    wall_seconds = time.perf_counter() - started
+    return {
+        "mode": mode,
+        "period": period,
+        "workers": workers,
+        "tickers": len(tickers),
+        "succeeded": succeeded,
+        "failed": len(tickers) - succeeded,
+        "wall_seconds": round(wall_seconds, 3),
+        "tickers_per_second": round(len(tickers) / wall_seconds, 3) if wall_seconds > 0 else None,
+        "errors_by_type": dict(errors),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train or predict stock models for one ticker or a ticker file.")
+    parser.add_argument("--tickers-file", help="file with one ticker per line; enables bulk mode")
+    parser.add_argument("--mode", choices=["train", "predict"], default="train")
+    parser.add_argument("--period", default=DEFAULT_TRAIN_PERIOD, help="data period, same default for both modes")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--out", default="-", help="JSON lines output file ('-' = stdout)")
+    args = parser.parse_args(argv)
+
+    # Without a ticker file keep the original behavior: train AAPL once.
+    if not args.tickers_file:
+        run(force_retrain=True)
+        return 0
+
+    tickers = read_tickers_file(args.tickers_file)
+    if args.out == "-":
+        summary = run_batch(tickers, mode=args.mode, period=args.period, workers=args.workers, out=sys.stdout)
+    else:
+        with open(args.out, "w", encoding="utf-8") as out:
+            summary = run_batch(tickers, mode=args.mode, period=args.period, workers=args.workers, out=out)
+
+    print(
+        f"{summary['mode']}: {summary['succeeded']}/{summary['tickers']} ok, {summary['failed']} failed "
+        f"in {summary['wall_seconds']:.1f}s ({summary['tickers_per_second']} tickers/s, {summary['workers']} workers)",
+        file=sys.stderr,
+    )
+    for error_type, count in sorted(summary["errors_by_type"].items()):
+        print(f"  {error_type}: {count}", file=sys.stderr)
+
+    return 0 if summary["failed"] == 0 else 1
+
+
 if __name__ == "__main__":
-    run(force_retrain=True)
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
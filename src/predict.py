@@ -1,17 +1,23 @@
 import joblib  # joblib loads the trained artifact file (saved models + metadata) from disk.
+import numpy as np  # Flattens single- and multi-output model predictions.
+import pandas as pd  # Rebuilds the one-row feature frame with the trained schema names.
 
 try:
     # Package-style import path (works when running inside module/package context).
-    from .config import BASELINE_BLEND_WEIGHT, FEATURE_COLUMNS, model_path_for_ticker
+    from .config import BASELINE_BLEND_WEIGHT, FEATURE_COLUMNS, model_path_for_ticker, pooled_model_path
+    from .artifacts import record_load
+    from .features import feature_matrix
 except ImportError:
     # Script-style fallback import (works when running this file directly).
-    from config import BASELINE_BLEND_WEIGHT, FEATURE_COLUMNS, model_path_for_ticker
+    from config import BASELINE_BLEND_WEIGHT, FEATURE_COLUMNS, model_path_for_ticker, pooled_model_path
+    from artifacts import record_load
+    from features import feature_matrix
 
 
-def load_artifact(ticker="AAPL", period="5y"):
+def load_artifact(ticker="AAPL", period="5y", pooled=False):
     # Build the expected model file path for this ticker and data period.
-    # Example outcome: models/model_AAPL_5y.pkl
-    model_path = model_path_for_ticker(ticker, period=period)
+    # Example outcome: models/model_AAPL_5y.pkl (or models/pooled_5y.pkl for the cross-ticker model)
+    model_path = pooled_model_path(period) if pooled else model_path_for_ticker(ticker, period=period)
 
     # Safety check: do not continue if trained model file does not exist.
     if not model_path.exists():
@@ -35,13 +41,16 @@ def load_artifact(ticker="AAPL", period="5y"):
             f"Model period mismatch (artifact: {artifact_period}, requested: {period}). Retrain for requested period."
         )
 
+    # Remember this use so disk-budget eviction keeps hot artifacts.
+    record_load(model_path)
+
     # Return validated artifact for prediction.
     return artifact
 
 
-def predict_price(data, ticker="AAPL", period="5y"):
-    # Load trained models + metadata for requested ticker/period.
-    artifact = load_artifact(ticker=ticker, period=period)
+def predict_price(data, ticker="AAPL", period="5y", pooled=False):
+    # Load trained models + metadata for requested ticker/period (pooled=True uses the cross-ticker model).
+    artifact = load_artifact(ticker=ticker, period=period, pooled=pooled)
 
     # Regressor: predicts numeric next price.
     price_model = artifact.get("price_model")
@@ -73,15 +82,72 @@ def predict_price(data, ticker="AAPL", period="5y"):
     current_price = float(close.iloc[-1])
 
     # Build one-row feature input using latest row only (predict next step from current state).
-    latest = data[feature_columns].iloc[-1:]
+    # Pooled artifacts were trained on price-relative features, so rebuild those the same way.
+    latest = feature_matrix(
+        data,
+        rows=slice(len(data) - 1, None),
+        columns=feature_columns,
+        relative=artifact.get("feature_transform") == "relative",
+    )
+
+    # Provider frames may carry multi-level column labels; models trained with feature names
+    # expect the flat schema names, older artifacts were fitted on unnamed values.
+    if hasattr(price_model, "feature_names_in_"):
+        latest = pd.DataFrame(latest, columns=list(feature_columns))
+
+    # Horizons learned by the model, in model output order (single-horizon artifacts store just one).
+    horizons = [int(horizon) for horizon in (artifact.get("horizons") or [artifact.get("target_horizon_days", 1)])]
+
+    # Raw regression output(s): one value per horizon from a single tree traversal.
+    raw_predictions = np.ravel(price_model.predict(latest))
+
+    # Optional classifier prediction (second opinion), again one label per horizon.
+    classifier_decisions = [None] * len(horizons)
+    if decision_model is not None:
+        try:
+            # Classifier predicts one of BUY/SELL/HOLD from latest features.
+            classifier_decisions = [str(label) for label in np.ravel(decision_model.predict(latest))]
+        except Exception:
+            # Do not fail whole prediction if classifier has an issue; continue with quantile decision.
+            classifier_decisions = [None] * len(horizons)
 
-    # Raw regression output from model.
-    raw_prediction = float(price_model.predict(latest)[0])
+    # Retrieve metrics payload saved during training (per-horizon section only in multi-horizon artifacts).
+    metrics = artifact.get("metrics", {})
+    if not isinstance(metrics, dict):
+        metrics = {}
+    horizon_metrics = metrics.get("horizons", {})
+
+    horizon_results = {}
+    for position, horizon in enumerate(horizons):
+        # Per-horizon metrics carry their own thresholds and trust controls;
+        # otherwise fall back to top-level metrics and artifact-level controls.
+        current_metrics = horizon_metrics.get(str(horizon), metrics)
+        horizon_results[horizon] = predict_horizon(
+            current_price=current_price,
+            raw_prediction=float(raw_predictions[position]),
+            classifier_decision=classifier_decisions[position] if position < len(classifier_decisions) else None,
+            metrics=current_metrics,
+            use_baseline=current_metrics.get("use_baseline", artifact.get("use_baseline", False)),
+            blend_weight=current_metrics.get("blend_weight", artifact.get("blend_weight", 1.0)),
+        )
+        horizon_results[horizon]["horizon_days"] = horizon
+
+    # Final prediction payload returned to API/frontend: primary horizon at top level
+    # (backward compatible), plus every horizon when the model learned several.
+    prediction_info = dict(horizon_results[horizons[0]])
+    if len(horizons) > 1:
+        prediction_info["horizons"] = {str(horizon): result for horizon, result in horizon_results.items()}
+
+    # Return both result payload and full artifact for callers that need metadata/models.
+    return prediction_info, artifact
 
+
+def predict_horizon(current_price, raw_prediction, classifier_decision, metrics, use_baseline, blend_weight):
+    # Turn one raw model output into price, blended return and BUY/HOLD/SELL decision for one horizon.
     # Identify what the regressor output means.
     # If target is next_close_price -> raw output is already a price.
     # Else assume output is return and convert to price.
-    target_type = artifact.get("metrics", {}).get("target")
+    target_type = metrics.get("target")
     if target_type == "next_close_price":
         model_price = raw_prediction
     else:
@@ -90,9 +156,9 @@ def predict_price(data, ticker="AAPL", period="5y"):
     # Convert model price into model-implied return.
     model_predicted_return = (model_price / current_price) - 1.0
 
-    # Read safety settings learned/selected at training time.
-    use_baseline = bool(artifact.get("use_baseline", False))
-    artifact_blend_weight = float(artifact.get("blend_weight", 1.0))
+    # Safety settings learned/selected at training time.
+    use_baseline = bool(use_baseline)
+    artifact_blend_weight = float(blend_weight)
 
     # Clamp blend weight into valid range [0, 1].
     if artifact_blend_weight < 0.0:
@@ -120,9 +186,6 @@ def predict_price(data, ticker="AAPL", period="5y"):
     # Decision logic uses pure model-implied return (before blend), by design.
     decision_return = model_predicted_return
 
-    # Retrieve metrics payload saved during training.
-    metrics = artifact.get("metrics", {})
-
     # Read quantile thresholds used to map returns into SELL/HOLD/BUY.
     decision_quantiles = metrics.get("decision_quantiles", {}) if isinstance(metrics, dict) else {}
     lower_q = float(decision_quantiles.get("lower", -0.002))
@@ -140,16 +203,6 @@ def predict_price(data, ticker="AAPL", period="5y"):
     else:
         quantile_decision = "HOLD"
 
-    # Optional classifier prediction (second opinion).
-    classifier_decision = None
-    if decision_model is not None:
-        try:
-            # Classifier predicts one of BUY/SELL/HOLD from latest features.
-            classifier_decision = str(decision_model.predict(latest)[0])
-        except Exception:
-            # Do not fail whole prediction if classifier has an issue; continue with quantile decision.
-            classifier_decision = None
-
     # Consensus policy:
     # If classifier and regression-quantile agree, mark joint source.
     # Otherwise trust regression-quantile as deterministic fallback.
@@ -169,7 +222,7 @@ def predict_price(data, ticker="AAPL", period="5y"):
     else:
         confidence = "low"
 
-    # Final prediction payload returned to API/frontend.
+    # Prediction payload for this horizon.
     # Contains prices, returns, safety flags, decision details, and thresholds for transparency.
     prediction_info = {
         # Latest market close.
@@ -215,5 +268,4 @@ def predict_price(data, ticker="AAPL", period="5y"):
         },
     }
 
-    # Return both result payload and full artifact for callers that need metadata/models.
-    return prediction_info, artifact
\ No newline at end of file
+    return prediction_info
@@ -0,0 +1,230 @@
+import json  # Metrics are stored as a JSON text column.
+import sqlite3  # Standard-library embedded database; one small file next to the artifacts.
+from datetime import datetime, timezone
+
+try:
+    # Package-style import path (works when running inside module/package context).
+    from .config import ARTIFACT_PATTERNS, MODELS_DIR, REGISTRY_PATH
+except ImportError:
+    # Script-style fallback import (works when running this file directly).
+    from config import ARTIFACT_PATTERNS, MODELS_DIR, REGISTRY_PATH
+
+
+# One row per ticker+period artifact. Everything here is readable without unpickling any model.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    ticker TEXT NOT NULL,
+    period TEXT NOT NULL,
+    model_file TEXT NOT NULL,
+    trained_at TEXT,
+    metrics TEXT,
+    quality_ratio REAL,
+    fingerprint TEXT,
+    file_size INTEGER,
+    artifact_version INTEGER,
+    PRIMARY KEY (ticker, period)
+)
+"""
+
+# Last time each artifact file was loaded for prediction (drives least-recently-used eviction).
+USAGE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifact_usage (
+    model_file TEXT PRIMARY KEY,
+    last_loaded_at REAL NOT NULL
+)
+"""
+
+# Columns returned by list/get helpers, in a stable order.
+COLUMNS = [
+    "ticker",
+    "period",
+    "model_file",
+    "trained_at",
+    "metrics",
+    "quality_ratio",
+    "fingerprint",
+    "file_size",
+    "artifact_version",
+]
+
+
+def _connect():
+    # Ensure the models folder exists (registry lives beside the artifacts it describes).
+    REGISTRY_PATH.parent.mkdir(parents=True, exist_ok=True)
+
+    # Short-lived connection per call keeps this safe across threads/processes.
+    # timeout waits for a concurrent writer instead of failing immediately.
+    connection = sqlite3.connect(REGISTRY_PATH, timeout=10)
+
+    # WAL lets readers (/models, /health) proceed while a training process writes.
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute(SCHEMA)
+    connection.execute(USAGE_SCHEMA)
+    return connection
+
+
+def _row_to_entry(row):
+    entry = dict(zip(COLUMNS, row))
+    entry["metrics"] = json.loads(entry["metrics"]) if entry["metrics"] else None
+    return entry
+
+
+def record_artifact(artifact, model_path):
+    # Upsert registry entry for a freshly saved artifact (called by train_model after joblib.dump).
+    metrics = artifact.get("metrics") or {}
+
+    values = (
+        str(artifact.get("ticker", "")).upper(),
+        str(artifact.get("period", "")),
+        str(model_path),
+        artifact.get("trained_at"),
+        json.dumps(metrics),
+        float(metrics.get("quality_ratio", 0.0)),
+        artifact.get("fingerprint"),
+        int(model_path.stat().st_size) if model_path.exists() else None,
+        artifact.get("artifact_version"),
+    )
+
+    connection = _connect()
+    try:
+        with connection:
+            connection.execute(
+                f"INSERT OR REPLACE INTO models ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)})",
+                values,
+            )
+    finally:
+        connection.close()
+
+
+def remove_entry(ticker, period):
+    # Drop a registry entry (used when an artifact file is deleted).
+    connection = _connect()
+    try:
+        with connection:
+            connection.execute(
+                "DELETE FROM models WHERE ticker = ? AND period = ?",
+                ((ticker or "").upper().strip(), str(period)),
+            )
+    finally:
+        connection.close()
+
+
+def remove_file_entries(model_file):
+    # Drop registry + usage rows pointing at an artifact file (used by eviction/garbage collection).
+    connection = _connect()
+    try:
+        with connection:
+            connection.execute("DELETE FROM models WHERE model_file = ?", (str(model_file),))
+            connection.execute("DELETE FROM artifact_usage WHERE model_file = ?", (str(model_file),))
+    finally:
+        connection.close()
+
+
+def touch_artifacts(loaded_times):
+    # Record last-load times {model_file: unix timestamp} in one transaction (flushed by artifacts.flush_load_times).
+    if not loaded_times:
+        return
+    connection = _connect()
+    try:
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO artifact_usage (model_file, last_loaded_at) VALUES (?, ?)",
+                [(str(model_file), float(loaded_at)) for model_file, loaded_at in loaded_times.items()],
+            )
+    finally:
+        connection.close()
+
+
+def last_loaded_times():
+    # {model_file: unix timestamp of last load} for every artifact loaded at least once.
+    connection = _connect()
+    try:
+        rows = connection.execute("SELECT model_file, last_loaded_at FROM artifact_usage").fetchall()
+    finally:
+        connection.close()
+    return {model_file: float(loaded_at) for model_file, loaded_at in rows}
+
+
+def list_models(ticker=None, period=None, trained_after=None, min_quality_ratio=None, limit=None):
+    # Filtered listing straight from the index; no artifact is loaded.
+    clauses = []
+    params = []
+
+    if ticker:
+        clauses.append("ticker = ?")
+        params.append(ticker.upper().strip())
+    if period:
+        clauses.append("period = ?")
+        params.append(str(period).strip())
+    if trained_after:
+        # ISO-8601 UTC strings compare correctly as text.
+        clauses.append("trained_at >= ?")
+        params.append(str(trained_after))
+    if min_quality_ratio is not None:
+        clauses.append("quality_ratio >= ?")
+        params.append(float(min_quality_ratio))
+
+    query = f"SELECT {', '.join(COLUMNS)} FROM models"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY ticker, period"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(int(limit))
+
+    connection = _connect()
+    try:
+        rows = connection.execute(query, params).fetchall()
+    finally:
+        connection.close()
+
+    return [_row_to_entry(row) for row in rows]
+
+
+def get_model(ticker, period):
+    # Single-entry lookup by primary key; None when the ticker/period is not registered.
+    entries = list_models(ticker=ticker, period=period, limit=1)
+    return entries[0] if entries else None
+
+
+def count_models():
+    connection = _connect()
+    try:
+        return int(connection.execute("SELECT COUNT(*) FROM models").fetchone()[0])
+    finally:
+        connection.close()
+
+
+def rebuild_registry():
+    # One-off backfill for artifacts trained before the registry existed.
+    # This is the only path that unpickles artifacts; regular reads never do.
+    import joblib
+
+    registered = 0
+    model_paths = sorted({path for pattern in ARTIFACT_PATTERNS for path in MODELS_DIR.glob(pattern)})
+    for model_path in model_paths:
+        try:
+            artifact = joblib.load(model_path)
+        except Exception:
+            continue
+        if not isinstance(artifact, dict) or "price_model" not in artifact:
+            continue
+
+        record_artifact(artifact, model_path)
+        registered += 1
+
+    return registered
+
+
+def age_seconds(entry, now=None):
+    # Seconds since the entry was trained (None when trained_at is missing/invalid).
+    try:
+        trained_at = datetime.fromisoformat(entry["trained_at"])
+    except (TypeError, ValueError):
+        return None
+    now = now or datetime.now(timezone.utc)
+    return (now - trained_at).total_seconds()
+
+
+if __name__ == "__main__":
+    print(f"Registered {rebuild_registry()} artifact(s) in {REGISTRY_PATH}")
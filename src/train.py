@@ -1,6 +1,12 @@
+import hashlib  # Combines per-ticker data fingerprints for pooled artifacts.
+import io  # In-memory buffer for measuring serialized model size and load time.
+import logging  # Reports registry failures that must not fail a training.
+import os  # CPU count bounds the cross-validation thread pool.
+import time  # perf_counter for load/predict timings recorded in metrics.
+from concurrent.futures import ThreadPoolExecutor  # Cross-validation folds fit side by side on shared arrays.
 from datetime import datetime, timezone  # datetime gives current timestamp; timezone lets us store it in UTC safely.
 
-import joblib  # Used to save/load trained model artifacts to/from disk.
+import joblib  # Same serializer as the saved artifacts, so measured size/load time match production.
 import numpy as np  # Fast numerical utilities (inf, sqrt, array math).
 import pandas as pd  # DataFrame operations (cut, columns, slicing, labels).
 from sklearn.ensemble import RandomForestClassifier  # Predicts categorical actions: BUY/HOLD/SELL.
@@ -11,39 +17,81 @@ from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score  #
 try:
     # Package-style import (works when src is used as a Python package/module).
     from .config import (
+        ARTIFACT_VERSION,
         BASELINE_BLEND_WEIGHT,
         BASELINE_HARD_CUTOFF,
         BLEND_WEIGHT_WHEN_STRONGER,
         BLEND_WEIGHT_WHEN_WEAKER,
+        BUDGET_MIN_TREES,
+        BUDGET_TREE_SHAPES,
+        CV_FOLDS,
+        CV_WORKERS,
         FEATURE_COLUMNS,
         MIN_ROWS_FOR_TRAINING,
+        MODEL_SIZE_BUDGET_MB,
         N_ESTIMATORS,
+        POOLED_TREE_SHAPE,
+        PREDICT_LATENCY_BUDGET_MS,
         RANDOM_STATE,
         TARGET_HORIZON_DAYS,
+        TARGET_HORIZONS,
         TRAIN_SPLIT_RATIO,
         model_path_for_ticker,
+        pooled_model_path,
     )
+    from .artifacts import atomic_dump
+    from .features import data_fingerprint, feature_matrix
+    from .registry import record_artifact
 except ImportError:
     # Script-style fallback import (works when running this file directly).
     from config import (
+        ARTIFACT_VERSION,
         BASELINE_BLEND_WEIGHT,
         BASELINE_HARD_CUTOFF,
         BLEND_WEIGHT_WHEN_STRONGER,
         BLEND_WEIGHT_WHEN_WEAKER,
+        BUDGET_MIN_TREES,
+        BUDGET_TREE_SHAPES,
+        CV_FOLDS,
+        CV_WORKERS,
         FEATURE_COLUMNS,
         MIN_ROWS_FOR_TRAINING,
+        MODEL_SIZE_BUDGET_MB,
         N_ESTIMATORS,
+        POOLED_TREE_SHAPE,
+        PREDICT_LATENCY_BUDGET_MS,
         RANDOM_STATE,
         TARGET_HORIZON_DAYS,
+        TARGET_HORIZONS,
         TRAIN_SPLIT_RATIO,
         model_path_for_ticker,
+        pooled_model_path,
     )
+    from artifacts import atomic_dump
+    from features import data_fingerprint, feature_matrix
+    from registry import record_artifact
 
 
-def train_model(data, ticker="AAPL", period="5y"):
-    # data   -> engineered market dataframe (must already contain FEATURE_COLUMNS + Close).
-    # ticker -> model identity key (AAPL, MSFT, etc.) for saving/loading the correct artifact.
-    # period -> training window identity (1y, 5y, etc.), also used in artifact path/versioning.
+LOGGER = logging.getLogger(__name__)
+
+
+def train_model(
+    data,
+    ticker="AAPL",
+    period="5y",
+    horizons=None,
+    size_budget_mb=None,
+    latency_budget_ms=None,
+    cv_folds=None,
+):
+    # data     -> engineered market dataframe (must already contain FEATURE_COLUMNS + Close).
+    # ticker   -> model identity key (AAPL, MSFT, etc.) for saving/loading the correct artifact.
+    # period   -> training window identity (1y, 5y, etc.), also used in artifact path/versioning.
+    # horizons -> forecast horizons in trading days (default TARGET_HORIZONS); all are learned in one fit.
+    # size_budget_mb / latency_budget_ms -> serving budgets (None = config defaults, 0 = unlimited).
+    # cv_folds -> expanding-window cross-validation folds (None = CV_FOLDS, 0/1 = single split only).
+
+    horizons = resolve_horizons(horizons)
 
     # Build a list of required features that are missing from the incoming dataframe.
     missing = [column for column in FEATURE_COLUMNS if column not in data.columns]
@@ -53,136 +101,682 @@ def train_model(data, ticker="AAPL", period="5y"):
     if missing:
         raise ValueError(f"Missing required feature columns: {missing}")
 
-    # Copy input so training logic does not mutate the original object used elsewhere.
-    dataset = data.copy()
+    # Targets and the contiguous feature matrix, built from plain arrays (the caller's frame is not copied).
+    X, current_close, next_close = training_arrays(data, horizons)
+    row_count = len(X)
 
-    # Extract Close prices (the base signal used to build future targets).
-    close = dataset["Close"]
+    # Convert future movement into return form (one column per horizon).
+    # Positive return => price expected to rise; negative => expected to fall.
+    future_return = (next_close / current_close[:, None]) - 1.0
+
+    # Learn per-horizon decision thresholds and BUY/HOLD/SELL labels from the return distribution.
+    thresholds = [decision_thresholds(future_return[:, position]) for position in range(len(horizons))]
+    y_decision = np.column_stack(
+        [
+            decision_labels(future_return[:, position], lower_q, upper_q)
+            for position, (lower_q, upper_q) in enumerate(thresholds)
+        ]
+    )
 
-    # Defensive normalization: if Close arrives as 2D, flatten to 1D series.
-    # Some providers/libs occasionally return DataFrame-shaped columns.
-    if getattr(close, "ndim", 1) == 2:
-        close = close.iloc[:, 0]
+    # Chronological train/test split.
+    split_index = split_index_for(row_count)
+
+    # Optional cross-validation: folds run on a thread pool over views of the same X/targets.
+    # Without budgets the final forest shape is known up front, so folds fit while the final model fits.
+    cv_folds = CV_FOLDS if cv_folds is None else int(cv_folds)
+    budgets = resolve_budgets(size_budget_mb, latency_budget_ms)
+    cv_pool = None
+    fold_futures = []
+    if cv_folds >= 2:
+        cv_pool = ThreadPoolExecutor(
+            max_workers=CV_WORKERS or min(cv_folds, os.cpu_count() or 1),
+            thread_name_prefix="cv-fold",
+        )
+        if not budgets:
+            fold_futures = submit_cv_folds(
+                cv_pool, X, current_close, next_close, y_decision, thresholds, horizons, cv_folds, forest_params()
+            )
+
+    # Fit regressor + classifier and evaluate every horizon against its naive baseline
+    # (future close == today's close).
+    price_model, decision_model, metrics, use_baseline, blend_weight = fit_and_evaluate(
+        X_train=X[:split_index],
+        X_test=X[split_index:],
+        y_train=next_close[:split_index],
+        y_decision=y_decision,
+        split_index=split_index,
+        actual_test=next_close[split_index:],
+        baseline_test=np.repeat(current_close[split_index:, None], len(horizons), axis=1),
+        thresholds=thresholds,
+        horizons=horizons,
+        target="next_close_price",
+        size_budget_mb=size_budget_mb,
+        latency_budget_ms=latency_budget_ms,
+    )
 
-    # Save today's close explicitly as CurrentClose.
-    # This becomes the baseline prediction (tomorrow == today) in evaluation.
-    dataset["CurrentClose"] = close
+    if cv_pool is not None:
+        try:
+            # Budgeted forests are cross-validated with the shape/tree count that was actually kept.
+            if budgets:
+                fold_futures = submit_cv_folds(
+                    cv_pool,
+                    X,
+                    current_close,
+                    next_close,
+                    y_decision,
+                    thresholds,
+                    horizons,
+                    cv_folds,
+                    forest_params(price_model),
+                )
+            cv_metrics = aggregate_cv([future.result() for future in fold_futures], horizons)
+        finally:
+            cv_pool.shutdown(wait=True)
+
+        # Cross-validated quality replaces the single-split one for trust, blending and confidence.
+        metrics["cv"] = cv_metrics
+        use_baseline, blend_weight = apply_cv_metrics(metrics, cv_metrics, horizons)
 
-    # Create supervised target by shifting Close upward in time.
-    # Example with horizon=1: row t gets Close from row t+1 as NextClose.
-    dataset["NextClose"] = close.shift(-TARGET_HORIZON_DAYS)
+    # Artifact = full packaged model object saved to disk and later reloaded for inference.
+    # It contains models, schema, metrics, training metadata, and trust controls.
+    artifact = {
+        # Regressor for numeric next-close prediction.
+        "price_model": price_model,
 
-    # Explicit alias for regression target (predict absolute next close price).
-    dataset["Target"] = dataset["NextClose"]
+        # Classifier for BUY/HOLD/SELL recommendation.
+        "decision_model": decision_model,
 
-    # Convert future movement into return form.
-    # Positive return => price expected to rise; negative => expected to fall.
-    dataset["FutureReturn"] = (dataset["NextClose"] / dataset["CurrentClose"]) - 1.0
+        # Feature schema used during training (must match during prediction).
+        "feature_columns": FEATURE_COLUMNS,
 
-    # Remove rows made invalid by shifting/rolling edges (typically tail rows).
-    dataset.dropna(inplace=True)
+        # UTC timestamp for auditability and model freshness checks.
+        "trained_at": datetime.now(timezone.utc).isoformat(),
 
-    # Learn adaptive decision thresholds from this dataset's own return distribution.
-    # 0.33/0.67 quantiles roughly divide history into SELL, HOLD, BUY regions.
-    lower_q = float(dataset["FutureReturn"].quantile(0.33))
-    upper_q = float(dataset["FutureReturn"].quantile(0.67))
+        # Saved evaluation metrics.
+        "metrics": metrics,
 
-    # Safety guard for degenerate/flat datasets where quantiles can collapse.
-    # If lower >= upper, widen the band to 0.30/0.70.
-    if lower_q >= upper_q:
-        lower_q = float(dataset["FutureReturn"].quantile(0.30))
-        upper_q = float(dataset["FutureReturn"].quantile(0.70))
+        # Identity metadata.
+        "ticker": ticker.upper(),
+        "period": str(period),
 
-    # Convert numeric future return into class labels used by the classifier.
-    # bins: (-inf, lower_q] => SELL, (lower_q, upper_q] => HOLD, (upper_q, inf) => BUY.
-    dataset["DecisionTarget"] = pd.cut(
-        dataset["FutureReturn"],
-        bins=[-np.inf, lower_q, upper_q, np.inf],
-        labels=["SELL", "HOLD", "BUY"],
-        include_lowest=True,
-    ).astype(str)
+        # Hash of the bars/feature schema this model was trained on (detects stale or duplicate trainings).
+        "fingerprint": data_fingerprint(data),
+
+        # Artifact layout version for forward compatibility.
+        "artifact_version": ARTIFACT_VERSION,
+
+        # Forecast horizon metadata (primary horizon + every horizon learned, in model output order).
+        "target_horizon_days": horizons[0],
+        "horizons": horizons,
+
+        # Safety/trust controls used later in prediction blending.
+        "use_baseline": use_baseline,
+        "blend_weight": blend_weight,
+    }
+
+    # Build file path scoped to ticker+period so artifacts do not overwrite each other.
+    save_artifact(artifact, model_path_for_ticker(ticker, period=period))
+
+    # Return artifact immediately so caller can use metrics/metadata without reloading from disk.
+    return artifact
+
+
+def train_pooled_model(datasets, period="5y", horizons=None, size_budget_mb=None, latency_budget_ms=None, tree_shape=None):
+    # datasets -> {ticker: engineered dataframe}; every ticker contributes rows to ONE shared model.
+    # period   -> identity of the pooled artifact (pooled_<period>.pkl).
+    # Features are rescaled by price (ticker-agnostic) and the target is the future return, so the same
+    # model can score any symbol, including ones it never saw.
+
+    horizons = resolve_horizons(horizons)
+
+    train_parts = []
+    test_parts = []
+    tickers = []
+    skipped = {}
+    fingerprints = []
+
+    for ticker, data in datasets.items():
+        ticker = str(ticker).upper().strip()
+
+        # Tickers with missing features or too little history are skipped, not fatal for the batch.
+        missing = [column for column in FEATURE_COLUMNS if column not in data.columns]
+        if missing:
+            skipped[ticker] = f"Missing required feature columns: {missing}"
+            continue
+        try:
+            X, current_close, next_close = training_arrays(data, horizons, relative=True)
+        except ValueError as error:
+            skipped[ticker] = str(error)
+            continue
+
+        # Future return per horizon is the pooled regression target (scale-free across tickers).
+        future_return = (next_close / current_close[:, None]) - 1.0
+
+        # Split each ticker chronologically so every test row is later than that ticker's training rows.
+        split_index = split_index_for(len(X))
+        train_parts.append((X[:split_index], future_return[:split_index]))
+        test_parts.append((X[split_index:], future_return[split_index:]))
+        tickers.append(ticker)
+        fingerprints.append(data_fingerprint(data))
+
+    if not tickers:
+        raise ValueError("No ticker had enough data for pooled training.")
+
+    # Stack all tickers into one contiguous train block followed by one test block.
+    X_all = stack_rows([part[0] for part in train_parts] + [part[0] for part in test_parts])
+    returns_all = np.concatenate([part[1] for part in train_parts] + [part[1] for part in test_parts])
+    split_index = sum(len(part[0]) for part in train_parts)
+
+    # Decision thresholds/labels are learned from the pooled return distribution.
+    thresholds = [decision_thresholds(returns_all[:, position]) for position in range(len(horizons))]
+    y_decision = np.column_stack(
+        [
+            decision_labels(returns_all[:, position], lower_q, upper_q)
+            for position, (lower_q, upper_q) in enumerate(thresholds)
+        ]
+    )
+
+    # Baseline in return space is "no movement" (0% return), the pooled equivalent of tomorrow == today.
+    price_model, decision_model, metrics, use_baseline, blend_weight = fit_and_evaluate(
+        X_train=X_all[:split_index],
+        X_test=X_all[split_index:],
+        y_train=returns_all[:split_index],
+        y_decision=y_decision,
+        split_index=split_index,
+        actual_test=returns_all[split_index:],
+        baseline_test=np.zeros_like(returns_all[split_index:]),
+        thresholds=thresholds,
+        horizons=horizons,
+        target="next_return",
+        size_budget_mb=size_budget_mb,
+        latency_budget_ms=latency_budget_ms,
+        tree_shape=tree_shape or POOLED_TREE_SHAPE,
+    )
+
+    artifact = {
+        "price_model": price_model,
+        "decision_model": decision_model,
+        "feature_columns": FEATURE_COLUMNS,
+
+        # Prediction must rebuild the same price-relative features.
+        "feature_transform": "relative",
+
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+        "metrics": metrics,
+
+        # Identity metadata: the pooled model answers for any ticker.
+        "ticker": "POOLED",
+        "period": str(period),
+        "tickers": tickers,
+        "skipped_tickers": skipped,
+
+        "fingerprint": hashlib.sha256(",".join(fingerprints).encode()).hexdigest()[:16],
+        "artifact_version": ARTIFACT_VERSION,
+        "target_horizon_days": horizons[0],
+        "horizons": horizons,
+        "use_baseline": use_baseline,
+        "blend_weight": blend_weight,
+    }
+
+    save_artifact(artifact, pooled_model_path(period))
+    return artifact
+
+
+def fit_and_evaluate(
+    X_train,
+    X_test,
+    y_train,
+    y_decision,
+    split_index,
+    actual_test,
+    baseline_test,
+    thresholds,
+    horizons,
+    target,
+    size_budget_mb=None,
+    latency_budget_ms=None,
+    tree_shape=None,
+):
+    # Shared fit + evaluation for per-ticker and pooled training.
+    # y_train/actual_test/baseline_test have one column per horizon; y_decision covers train+test rows.
+    # Returns (price_model, decision_model, metrics, use_baseline, blend_weight).
+
+    # Single horizon keeps the classic 1D targets; several horizons become one multi-output fit.
+    if len(horizons) == 1:
+        y_train = y_train[:, 0]
+        y_decision = y_decision[:, 0]
+
+    # Feature split wrapped with column names so models keep the feature schema (row views, no copy).
+    X_train = pd.DataFrame(X_train, columns=FEATURE_COLUMNS, copy=False)
+    X_test = pd.DataFrame(X_test, columns=FEATURE_COLUMNS, copy=False)
+
+    # Fit regressor + classifier (shrunk to the serving budgets when any is set) and measure serving cost.
+    price_model, decision_model, serving = fit_forests(
+        X_train,
+        y_train,
+        y_decision[:split_index],
+        X_probe=X_test.iloc[-1:],
+        size_budget_mb=size_budget_mb,
+        latency_budget_ms=latency_budget_ms,
+        tree_shape=tree_shape,
+    )
+
+    # Predict on unseen test window; reshape so column k always belongs to horizons[k].
+    pred_test = price_model.predict(X_test).reshape(len(X_test), len(horizons))
+    pred_decision = np.asarray(decision_model.predict(X_test)).reshape(len(X_test), len(horizons))
+    decision_test = y_decision[split_index:].reshape(len(X_test), len(horizons))
+
+    # Evaluate each horizon against its own naive baseline.
+    horizon_metrics = {}
+    for position, horizon in enumerate(horizons):
+        lower_q, upper_q = thresholds[position]
+        horizon_metrics[horizon] = evaluate_horizon(
+            actual_next_close=actual_test[:, position],
+            baseline_next_close=baseline_test[:, position],
+            pred_next_close=pred_test[:, position],
+            decision_true=decision_test[:, position],
+            decision_pred=pred_decision[:, position],
+            lower_q=lower_q,
+            upper_q=upper_q,
+            train_rows=len(X_train),
+            test_rows=len(X_test),
+            target=target,
+        )
+
+    # Top-level metrics/trust controls describe the primary (shortest) horizon for backward compatibility.
+    primary_metrics = horizon_metrics[horizons[0]]
+    metrics = {key: value for key, value in primary_metrics.items() if key not in {"use_baseline", "blend_weight"}}
+
+    # Multi-horizon artifacts also keep every horizon's metrics, thresholds and trust controls.
+    if len(horizons) > 1:
+        metrics["horizons"] = {str(horizon): horizon_metrics[horizon] for horizon in horizons}
+
+    # Tree count, plus measured serving cost (bytes, load time, single-row predict time) and budget outcome
+    # for budgeted runs.
+    metrics["serving"] = serving
+
+    return price_model, decision_model, metrics, primary_metrics["use_baseline"], primary_metrics["blend_weight"]
+
+
+def fit_forests(
+    X_train, y_train, y_decision_train, X_probe, size_budget_mb=None, latency_budget_ms=None, tree_shape=None
+):
+    # Returns (price_model, decision_model, serving) where serving holds the measured serving cost.
+    # Without budgets this is one forest pair of tree_shape=(max_depth, min_samples_leaf), by default the
+    # classic unbounded trees. With a size and/or latency budget, tree shapes from BUDGET_TREE_SHAPES (no deeper
+    # than tree_shape) are tried from largest to smallest; each fitted pair is pruned to fewer trees
+    # (size and latency grow ~linearly with tree count) and the first pair within budget is kept.
+    budgets = resolve_budgets(size_budget_mb, latency_budget_ms)
+
+    tree_shape = tuple(tree_shape or (None, 1))
+    if not budgets:
+        shapes = [tree_shape]
+    elif tree_shape[0] is None:
+        shapes = BUDGET_TREE_SHAPES
+    else:
+        shapes = [tree_shape] + [shape for shape in BUDGET_TREE_SHAPES if shape[0] is not None and shape[0] < tree_shape[0]]
+
+    for position, (max_depth, min_samples_leaf) in enumerate(shapes):
+        # Build regression model that predicts future close price(s) or return(s).
+        # n_estimators controls number of trees.
+        # random_state ensures reproducibility.
+        # n_jobs=1 keeps behavior deterministic across machines/environments.
+        price_model = RandomForestRegressor(
+            n_estimators=N_ESTIMATORS,
+            max_depth=max_depth,
+            min_samples_leaf=min_samples_leaf,
+            random_state=RANDOM_STATE,
+            n_jobs=1,
+        )
+
+        # Fit regressor once for every horizon (multi-output trees share splits across horizons).
+        price_model.fit(X_train, y_train)
+
+        # Build classification model for BUY/HOLD/SELL labels (same tree shape as the regressor).
+        decision_model = RandomForestClassifier(
+            n_estimators=N_ESTIMATORS,
+            max_depth=max_depth,
+            min_samples_leaf=min_samples_leaf,
+            random_state=RANDOM_STATE,
+            n_jobs=1,
+        )
+
+        # Fit classifier on same features but categorical action target(s).
+        decision_model.fit(X_train, y_decision_train)
+
+        # Measuring serving cost dumps, reloads and probes both forests, so it only runs for budgeted
+        # training; unbudgeted artifacts get their file size recorded by save_artifact instead.
+        if not budgets:
+            return price_model, decision_model, {
+                "n_estimators": len(price_model.estimators_),
+                "max_depth": max_depth,
+                "min_samples_leaf": min_samples_leaf,
+            }
+
+        serving = serving_cost(price_model, decision_model, X_probe)
+
+        # Drop trees until the measured cost fits, re-measuring after every cut.
+        trees = N_ESTIMATORS
+        while not within_budget(serving, budgets) and trees > BUDGET_MIN_TREES:
+            fraction = min(budgets[key] / max(serving[key], 1e-12) for key in budgets)
+            trees = max(BUDGET_MIN_TREES, min(trees - 1, int(trees * fraction * 0.95)))
+            prune_forest(price_model, trees)
+            prune_forest(decision_model, trees)
+            serving = serving_cost(price_model, decision_model, X_probe)
+
+        # Smallest shape is kept even when it still misses the budget (recorded as budget_met=False).
+        if within_budget(serving, budgets) or position == len(shapes) - 1:
+            serving["budget"] = {
+                "artifact_bytes": budgets.get("artifact_bytes"),
+                "predict_seconds": budgets.get("predict_seconds"),
+                "budget_met": within_budget(serving, budgets),
+                "n_estimators": trees,
+                "max_depth": max_depth,
+                "min_samples_leaf": min_samples_leaf,
+            }
+            return price_model, decision_model, serving
+
+
+def resolve_budgets(size_budget_mb=None, latency_budget_ms=None):
+    # Active serving budgets keyed like serving_cost() output (None = config default, 0 = no budget).
+    size_budget_mb = MODEL_SIZE_BUDGET_MB if size_budget_mb is None else float(size_budget_mb)
+    latency_budget_ms = PREDICT_LATENCY_BUDGET_MS if latency_budget_ms is None else float(latency_budget_ms)
+    budgets = {
+        "artifact_bytes": size_budget_mb * 1024 * 1024,
+        "predict_seconds": latency_budget_ms / 1000,
+    }
+    return {key: value for key, value in budgets.items() if value > 0}
+
+
+def forest_params(model=None):
+    # Constructor arguments shared by regressor and classifier: the unbudgeted defaults, or the
+    # shape/tree count of an already fitted (possibly budget-pruned) forest.
+    if model is None:
+        return {"n_estimators": N_ESTIMATORS, "max_depth": None, "min_samples_leaf": 1}
+    return {
+        "n_estimators": len(model.estimators_),
+        "max_depth": model.max_depth,
+        "min_samples_leaf": model.min_samples_leaf,
+    }
+
+
+def cv_fold_bounds(row_count, folds):
+    # Expanding-window folds: `folds` equal test blocks at the end of the data, each fold trained on every
+    # row before its block (same layout as sklearn's TimeSeriesSplit).
+    test_size = row_count // (folds + 1)
+    if test_size < 1:
+        raise ValueError(f"Not enough rows ({row_count}) for {folds} cross-validation folds.")
+    return [
+        (row_count - (folds - fold) * test_size, row_count - (folds - fold - 1) * test_size)
+        for fold in range(folds)
+    ]
+
+
+def submit_cv_folds(pool, X, current_close, next_close, y_decision, thresholds, horizons, folds, params):
+    # One future per fold; every fold reads row slices (views) of the same arrays, nothing is copied.
+    return [
+        pool.submit(
+            evaluate_fold, X, current_close, next_close, y_decision, thresholds, horizons, test_start, test_end, params
+        )
+        for test_start, test_end in cv_fold_bounds(len(X), folds)
+    ]
+
+
+def evaluate_fold(X, current_close, next_close, y_decision, thresholds, horizons, test_start, test_end, params):
+    # Fit regressor + classifier on rows [0, test_start) and score rows [test_start, test_end).
+    X_train = pd.DataFrame(X[:test_start], columns=FEATURE_COLUMNS, copy=False)
+    X_test = pd.DataFrame(X[test_start:test_end], columns=FEATURE_COLUMNS, copy=False)
+    y_train = next_close[:test_start]
+    y_decision_train = y_decision[:test_start]
+    if len(horizons) == 1:
+        y_train = y_train[:, 0]
+        y_decision_train = y_decision_train[:, 0]
+
+    price_model = RandomForestRegressor(random_state=RANDOM_STATE, n_jobs=1, **params)
+    price_model.fit(X_train, y_train)
+    decision_model = RandomForestClassifier(random_state=RANDOM_STATE, n_jobs=1, **params)
+    decision_model.fit(X_train, y_decision_train)
+
+    pred_test = price_model.predict(X_test).reshape(len(X_test), len(horizons))
+    pred_decision = np.asarray(decision_model.predict(X_test)).reshape(len(X_test), len(horizons))
+
+    fold = {"train_rows": int(test_start), "test_rows": int(test_end - test_start), "horizons": {}}
+    for position, horizon in enumerate(horizons):
+        lower_q, upper_q = thresholds[position]
+        horizon_metrics = evaluate_horizon(
+            actual_next_close=next_close[test_start:test_end, position],
+            baseline_next_close=current_close[test_start:test_end],
+            pred_next_close=pred_test[:, position],
+            decision_true=y_decision[test_start:test_end, position],
+            decision_pred=pred_decision[:, position],
+            lower_q=lower_q,
+            upper_q=upper_q,
+            train_rows=test_start,
+            test_rows=test_end - test_start,
+        )
+        fold["horizons"][str(horizon)] = {
+            key: horizon_metrics[key] for key in ("mae", "rmse", "r2", "baseline_mae", "quality_ratio", "decision_accuracy")
+        }
+    return fold
+
+
+def aggregate_cv(folds, horizons):
+    # Per-fold metrics plus test-row-weighted aggregates per horizon; the aggregate quality ratio is
+    # pooled baseline MAE / pooled model MAE, so one noisy fold cannot flip the trust controls on its own.
+    weights = np.array([fold["test_rows"] for fold in folds], dtype=np.float64)
+
+    aggregate = {}
+    for horizon in horizons:
+        per_fold = [fold["horizons"][str(horizon)] for fold in folds]
+        mae = float(np.average([entry["mae"] for entry in per_fold], weights=weights))
+        baseline_mae = float(np.average([entry["baseline_mae"] for entry in per_fold], weights=weights))
+        quality_ratio = float(baseline_mae / max(mae, 1e-12))
+        use_baseline, blend_weight = trust_controls(quality_ratio)
+        aggregate[str(horizon)] = {
+            "mae": mae,
+            "baseline_mae": baseline_mae,
+            "quality_ratio": quality_ratio,
+            "quality_ratio_std": float(np.std([entry["quality_ratio"] for entry in per_fold])),
+            "decision_accuracy": float(np.average([entry["decision_accuracy"] for entry in per_fold], weights=weights)),
+            "use_baseline": use_baseline,
+            "blend_weight": blend_weight,
+        }
+
+    cv_metrics = {
+        "scheme": "expanding-window",
+        "folds": folds,
+        # Primary horizon at top level, like the rest of the metrics.
+        "aggregate": aggregate[str(horizons[0])],
+    }
+    if len(horizons) > 1:
+        cv_metrics["horizons"] = aggregate
+    return cv_metrics
+
+
+def apply_cv_metrics(metrics, cv_metrics, horizons):
+    # Swap single-split quality for the cross-validated one (the split value stays as holdout_quality_ratio).
+    # Returns the primary horizon's (use_baseline, blend_weight) for the artifact's top-level controls.
+    primary = cv_metrics["aggregate"]
+    metrics["holdout_quality_ratio"] = metrics["quality_ratio"]
+    metrics["quality_ratio"] = primary["quality_ratio"]
+
+    for horizon in horizons if len(horizons) > 1 else []:
+        horizon_metrics = metrics["horizons"][str(horizon)]
+        aggregate = cv_metrics["horizons"][str(horizon)]
+        horizon_metrics["holdout_quality_ratio"] = horizon_metrics["quality_ratio"]
+        horizon_metrics["quality_ratio"] = aggregate["quality_ratio"]
+        horizon_metrics["use_baseline"] = aggregate["use_baseline"]
+        horizon_metrics["blend_weight"] = aggregate["blend_weight"]
+
+    return primary["use_baseline"], primary["blend_weight"]
+
+
+def serving_cost(price_model, decision_model, X_probe):
+    # Serialized size and load time of both forests (they dominate the artifact) plus the best-of-5
+    # single-row predict time of regressor + classifier, the work done per /predict request.
+    buffer = io.BytesIO()
+    joblib.dump({"price_model": price_model, "decision_model": decision_model}, buffer)
+    artifact_bytes = buffer.tell()
+
+    buffer.seek(0)
+    started = time.perf_counter()
+    joblib.load(buffer)
+    load_seconds = time.perf_counter() - started
+
+    predict_seconds = float("inf")
+    for _ in range(5):
+        started = time.perf_counter()
+        price_model.predict(X_probe)
+        decision_model.predict(X_probe)
+        predict_seconds = min(predict_seconds, time.perf_counter() - started)
+
+    return {
+        "artifact_bytes": int(artifact_bytes),
+        "load_seconds": float(load_seconds),
+        "predict_seconds": float(predict_seconds),
+        "n_estimators": len(price_model.estimators_),
+    }
+
+
+def within_budget(serving, budgets):
+    return all(serving[key] <= limit for key, limit in budgets.items())
+
+
+def prune_forest(model, trees):
+    # Keep the first `trees` fitted trees; a forest's prediction is the average/vote over estimators_.
+    model.estimators_ = model.estimators_[:trees]
+    model.n_estimators = trees
+
+
+def stack_rows(blocks):
+    # Concatenate float32 feature blocks into one Fortran-ordered matrix with a single allocation.
+    matrix = np.empty((sum(len(block) for block in blocks), len(FEATURE_COLUMNS)), dtype=np.float32, order="F")
+    offset = 0
+    for block in blocks:
+        matrix[offset : offset + len(block)] = block
+        offset += len(block)
+    return matrix
+
+
+def save_artifact(artifact, model_path):
+    # Ensure parent folder exists before writing artifact.
+    model_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Save artifact to disk atomically (temp file + rename); prediction service later reloads this file.
+    atomic_dump(artifact, model_path)
+
+    # Size of the saved file (a stat, not a re-serialization); lands in the returned artifact and the
+    # registry metrics, not in the pickle itself.
+    serving = (artifact.get("metrics") or {}).get("serving")
+    if isinstance(serving, dict):
+        serving["file_bytes"] = int(model_path.stat().st_size)
+
+    # Index the artifact so listings/freshness checks never need to unpickle it.
+    # Registry problems must not fail an otherwise successful training.
+    try:
+        record_artifact(artifact, model_path)
+    except Exception:
+        LOGGER.warning("Could not register artifact %s in the model registry.", model_path, exc_info=True)
+
+
+def training_arrays(data, horizons, relative=False):
+    # Returns (X, current_close, next_close) for every usable row of one ticker's engineered dataframe.
+    # next_close has one column per horizon; relative=True builds ticker-agnostic features (pooled mode).
+
+    # Extract Close prices (the base signal used to build future targets).
+    close = data["Close"]
+
+    # Defensive normalization: if Close arrives as 2D, flatten to 1D series.
+    # Some providers/libs occasionally return DataFrame-shaped columns.
+    if getattr(close, "ndim", 1) == 2:
+        close = close.iloc[:, 0]
+
+    # Work on plain arrays instead of copying the whole dataframe and adding target columns to it.
+    # The caller's dataframe is left untouched and no second full-width frame is allocated.
+    close = close.to_numpy(dtype=np.float64)
+
+    # Create supervised targets by shifting Close upward in time, one column per horizon.
+    # Example with horizon=1: row t gets Close from row t+1 as NextClose; the last rows have no future (NaN).
+    next_close = np.full((len(close), len(horizons)), np.nan)
+    for position, horizon in enumerate(horizons):
+        if len(close) > horizon:
+            next_close[: len(close) - horizon, position] = close[horizon:]
+
+    # Usable rows have a known future close for every horizon and complete features.
+    valid = ~np.isnan(next_close).any(axis=1)
+    for column in FEATURE_COLUMNS:
+        valid &= ~np.isnan(data[column].to_numpy())
 
     # Ensure we have enough usable rows after feature engineering and shifting.
     # Too few rows produce unstable models and misleading metrics.
-    if len(dataset) < MIN_ROWS_FOR_TRAINING:
+    row_count = int(valid.sum())
+    if row_count < MIN_ROWS_FOR_TRAINING:
         raise ValueError(
             f"Not enough data for training. Need at least {MIN_ROWS_FOR_TRAINING} rows after feature engineering."
         )
 
-    # X          = model input matrix (all configured engineered features).
-    # y          = numeric target for regressor (next close price).
-    # y_decision = categorical target for classifier (BUY/HOLD/SELL).
-    X = dataset[FEATURE_COLUMNS]
-    y = dataset["Target"]
-    y_decision = dataset["DecisionTarget"]
+    # Invalid rows are normally only the shifted tail, so a slice (a view) selects the usable rows.
+    # Fall back to a boolean mask when gaps exist elsewhere.
+    rows = slice(0, row_count) if valid[:row_count].all() else valid
+
+    # X = model input matrix (all configured engineered features) as one contiguous array.
+    X = feature_matrix(data, rows=rows, relative=relative)
 
+    # CurrentClose = today's close; becomes the baseline prediction (future == today) in evaluation.
+    return X, close[rows], next_close[rows]
+
+
+def split_index_for(row_count):
     # Time-aware split index: keep chronology (past for training, future for testing).
     # No shuffling because stock time series must preserve temporal order.
-    split_index = max(int(len(dataset) * TRAIN_SPLIT_RATIO), 1)
+    split_index = max(int(row_count * TRAIN_SPLIT_RATIO), 1)
 
     # Ensure test set is non-empty; metrics require at least one test row.
-    if split_index >= len(dataset):
-        split_index = len(dataset) - 1
-
-    # Feature split.
-    X_train, X_test = X.iloc[:split_index], X.iloc[split_index:]
-
-    # Regression-target split.
-    y_train, y_test = y.iloc[:split_index], y.iloc[split_index:]
-
-    # Classification-target split.
-    y_decision_train = y_decision.iloc[:split_index]
-    y_decision_test = y_decision.iloc[split_index:]
-
-    # Keep current/next close in test window for baseline-vs-model comparison.
-    current_close_test = dataset["CurrentClose"].iloc[split_index:]
-    next_close_test = dataset["NextClose"].iloc[split_index:]
-
-    # Build regression model that predicts next close price.
-    # n_estimators controls number of trees.
-    # random_state ensures reproducibility.
-    # n_jobs=1 keeps behavior deterministic across machines/environments.
-    price_model = RandomForestRegressor(
-        n_estimators=N_ESTIMATORS,
-        random_state=RANDOM_STATE,
-        n_jobs=1,
-    )
+    if split_index >= row_count:
+        split_index = row_count - 1
 
-    # Fit regressor using training features and 1D numeric target.
-    # ravel() flattens to shape sklearn expects.
-    price_model.fit(X_train, y_train.to_numpy().ravel())
+    return split_index
 
-    # Build classification model for BUY/HOLD/SELL labels.
-    decision_model = RandomForestClassifier(
-        n_estimators=N_ESTIMATORS,
-        random_state=RANDOM_STATE,
-        n_jobs=1,
-    )
 
-    # Fit classifier on same features but categorical action target.
-    decision_model.fit(X_train, y_decision_train)
+def resolve_horizons(horizons=None):
+    # Normalize requested horizons to a sorted list of unique positive trading-day offsets.
+    if horizons is None:
+        horizons = TARGET_HORIZONS or [TARGET_HORIZON_DAYS]
+    if isinstance(horizons, (int, np.integer)):
+        horizons = [horizons]
 
-    # Predict on unseen test window.
-    pred_next_close = price_model.predict(X_test)
-    pred_decision = decision_model.predict(X_test)
+    resolved = sorted({int(horizon) for horizon in horizons})
+    if not resolved or resolved[0] < 1:
+        raise ValueError("Forecast horizons must be positive whole trading days.")
+    return resolved
 
-    # Ground truth future prices from dataset.
-    actual_next_close = next_close_test.to_numpy()
 
-    # Naive baseline assumes no movement: tomorrow equals today's close.
-    baseline_next_close = current_close_test.to_numpy()
+def decision_thresholds(future_return):
+    # Learn adaptive decision thresholds from this dataset's own return distribution.
+    # 0.33/0.67 quantiles roughly divide history into SELL, HOLD, BUY regions.
+    lower_q = float(np.quantile(future_return, 0.33))
+    upper_q = float(np.quantile(future_return, 0.67))
 
-    # Baseline error (lower is better).
-    baseline_mae = float(mean_absolute_error(actual_next_close, baseline_next_close))
+    # Safety guard for degenerate/flat datasets where quantiles can collapse.
+    # If lower >= upper, widen the band to 0.30/0.70.
+    if lower_q >= upper_q:
+        lower_q = float(np.quantile(future_return, 0.30))
+        upper_q = float(np.quantile(future_return, 0.70))
 
-    # Model error (lower is better).
-    model_mae = float(mean_absolute_error(actual_next_close, pred_next_close))
+    return lower_q, upper_q
 
-    # quality_ratio compares baseline to model.
-    # >1.0 => model better than baseline, <1.0 => model worse than baseline.
-    # Small epsilon prevents division by zero if model_mae is extremely tiny.
-    quality_ratio = float(baseline_mae / max(model_mae, 1e-12))
 
+def decision_labels(future_return, lower_q, upper_q):
+    # Convert numeric future return into class labels used by the classifier.
+    # bins: (-inf, lower_q] => SELL, (lower_q, upper_q] => HOLD, (upper_q, inf) => BUY.
+    return np.select(
+        [future_return <= lower_q, future_return <= upper_q],
+        ["SELL", "HOLD"],
+        default="BUY",
+    )
+
+
+def trust_controls(quality_ratio):
     # Safety switch: if model quality is too low, activate baseline-protective mode.
     use_baseline = quality_ratio < BASELINE_HARD_CUTOFF
 
@@ -195,8 +789,36 @@ def train_model(data, ticker="AAPL", period="5y"):
     else:
         blend_weight = BLEND_WEIGHT_WHEN_STRONGER
 
+    return use_baseline, blend_weight
+
+
+def evaluate_horizon(
+    actual_next_close,
+    baseline_next_close,
+    pred_next_close,
+    decision_true,
+    decision_pred,
+    lower_q,
+    upper_q,
+    train_rows,
+    test_rows,
+    target="next_close_price",
+):
+    # Baseline error (lower is better). Naive baseline assumes no movement: future equals today's close.
+    baseline_mae = float(mean_absolute_error(actual_next_close, baseline_next_close))
+
+    # Model error (lower is better).
+    model_mae = float(mean_absolute_error(actual_next_close, pred_next_close))
+
+    # quality_ratio compares baseline to model.
+    # >1.0 => model better than baseline, <1.0 => model worse than baseline.
+    # Small epsilon prevents division by zero if model_mae is extremely tiny.
+    quality_ratio = float(baseline_mae / max(model_mae, 1e-12))
+
+    use_baseline, blend_weight = trust_controls(quality_ratio)
+
     # Store metrics for monitoring, confidence logic, and debugging in production.
-    metrics = {
+    return {
         # Average absolute price error.
         "mae": model_mae,
 
@@ -213,7 +835,7 @@ def train_model(data, ticker="AAPL", period="5y"):
         "quality_ratio": quality_ratio,
 
         # Classifier accuracy on BUY/HOLD/SELL labels in test window.
-        "decision_accuracy": float(accuracy_score(y_decision_test, pred_decision)),
+        "decision_accuracy": float(accuracy_score(decision_true, decision_pred)),
 
         # Persist label thresholds so inference can use consistent decision boundaries.
         "decision_quantiles": {
@@ -221,52 +843,15 @@ def train_model(data, ticker="AAPL", period="5y"):
             "upper": upper_q,
         },
 
-        # Explicit target type for forward compatibility in prediction logic.
-        "target": "next_close_price",
+        # Explicit target type for forward compatibility in prediction logic
+        # (next_close_price for per-ticker models, next_return for pooled models).
+        "target": target,
 
         # Data volume metadata for observability and diagnostics.
-        "train_rows": int(len(X_train)),
-        "test_rows": int(len(X_test)),
-    }
-
-    # Artifact = full packaged model object saved to disk and later reloaded for inference.
-    # It contains models, schema, metrics, training metadata, and trust controls.
-    artifact = {
-        # Regressor for numeric next-close prediction.
-        "price_model": price_model,
-
-        # Classifier for BUY/HOLD/SELL recommendation.
-        "decision_model": decision_model,
+        "train_rows": int(train_rows),
+        "test_rows": int(test_rows),
 
-        # Feature schema used during training (must match during prediction).
-        "feature_columns": FEATURE_COLUMNS,
-
-        # UTC timestamp for auditability and model freshness checks.
-        "trained_at": datetime.now(timezone.utc).isoformat(),
-
-        # Saved evaluation metrics.
-        "metrics": metrics,
-
-        # Identity metadata.
-        "ticker": ticker.upper(),
-        "period": str(period),
-
-        # Forecast horizon metadata.
-        "target_horizon_days": TARGET_HORIZON_DAYS,
-
-        # Safety/trust controls used later in prediction blending.
+        # Trust controls for this horizon (top-level artifact keys mirror the primary horizon).
         "use_baseline": use_baseline,
         "blend_weight": blend_weight,
     }
-
-    # Build file path scoped to ticker+period so artifacts do not overwrite each other.
-    model_path = model_path_for_ticker(ticker, period=period)
-
-    # Ensure parent folder exists before writing artifact.
-    model_path.parent.mkdir(parents=True, exist_ok=True)
-
-    # Save artifact to disk; prediction service later reloads this file.
-    joblib.dump(artifact, model_path)
-
-    # Return artifact immediately so caller can use metrics/metadata without reloading from disk.
-    return artifact
\ No newline at end of file
@@ -0,0 +1,92 @@
+import time
+
+import pandas as pd
+import pytest
+import requests
+import yfinance as yf
+from yfinance.data import YfData
+from yfinance.exceptions import YFRateLimitError
+
+from src import fetch
+
+
+# Yahoo's reply to a chart request for a symbol it does not know (HTTP 404).
+UNKNOWN_SYMBOL_REPLY = {
+    "chart": {
+        "result": None,
+        "error": {"code": "Not Found", "description": "No data found, symbol may be delisted"},
+    }
+}
+
+
+class StubResponse:
+    def __init__(self, payload):
+        self.payload = payload
+        self.text = str(payload)
+        self.status_code = 404
+
+    def json(self):
+        return self.payload
+
+    def raise_for_status(self):
+        raise requests.HTTPError(f"{self.status_code} Client Error: Not Found")
+
+
+@pytest.fixture
+def yahoo(monkeypatch):
+    # yf.download swallows every error and returns an empty frame; chart lookups go through YfData.get.
+    calls = {"download": 0, "chart": 0}
+
+    def fake_download(*args, **kwargs):
+        calls["download"] += 1
+        return pd.DataFrame()
+
+    def fake_get(self, url, params=None, timeout=30):
+        calls["chart"] += 1
+        return calls["reply"](url)
+
+    calls["reply"] = lambda url: StubResponse(UNKNOWN_SYMBOL_REPLY)
+    monkeypatch.setattr(yf, "download", fake_download)
+    monkeypatch.setattr(YfData, "get", fake_get)
+    monkeypatch.setattr(fetch, "MARKET_DATA_URL", "")
+    monkeypatch.setattr(fetch, "FETCH_NEGATIVE_CACHE_TTL_SECONDS", 600)
+    monkeypatch.setattr(fetch, "FETCH_RATE_LIMIT_PER_SECOND", 0)
+    fetch.NEGATIVE_CACHE.clear()
+    yield calls
+    fetch.NEGATIVE_CACHE.clear()
+
+
+def test_unknown_symbol_is_confirmed_from_yahoo_chart_error(yahoo):
+    assert fetch._symbol_is_unknown("ZZZXQQ1", time.monotonic() + 10) is True
+
+
+def test_unknown_symbol_fails_fast_on_second_call(yahoo):
+    with pytest.raises(ValueError):
+        fetch.fetch_stock_data("ZZZXQQ1", "1y", retries=1)
+    assert ("ZZZXQQ1", "1y") in fetch.NEGATIVE_CACHE
+    calls_after_first = dict(yahoo)
+
+    started = time.monotonic()
+    with pytest.raises(ValueError, match="unknown symbol"):
+        fetch.fetch_stock_data("ZZZXQQ1", "1y", retries=1)
+    assert time.monotonic() - started < 0.5
+    assert yahoo["download"] == calls_after_first["download"]
+    assert yahoo["chart"] == calls_after_first["chart"]
+
+
+def test_rate_limited_lookup_is_not_cached(yahoo):
+    def rate_limited(url):
+        raise YFRateLimitError()
+
+    yahoo["reply"] = rate_limited
+    with pytest.raises(ValueError):
+        fetch.fetch_stock_data("ZZZXQQ1", "1y", retries=1)
+    assert ("ZZZXQQ1", "1y") not in fetch.NEGATIVE_CACHE
+
+
+def test_transport_error_is_not_cached(yahoo):
+    def unreachable(url):
+        raise ConnectionError("connection reset")
+
+    yahoo["reply"] = unreachable
+    assert fetch._symbol_is_unknown("ZZZXQQ1", time.monotonic() + 10) is False